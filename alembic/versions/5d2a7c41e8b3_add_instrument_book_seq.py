@@ -0,0 +1,28 @@
+"""Add instrument book_seq
+
+Revision ID: 5d2a7c41e8b3
+Revises: 251ecf2b22e9
+Create Date: 2026-10-17 10:12:41.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a7c41e8b3'
+down_revision: Union[str, None] = '251ecf2b22e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('instruments', sa.Column('book_seq', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('instruments', 'book_seq')
@@ -0,0 +1,34 @@
+"""Add partial index for open orders book
+
+Revision ID: 9c41f0d6b27e
+Revises: 5d2a7c41e8b3
+Create Date: 2026-10-17 11:03:27.551904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41f0d6b27e'
+down_revision: Union[str, None] = '5d2a7c41e8b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_orders_open_book',
+        'orders',
+        ['ticker', 'direction', 'price', 'timestamp'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('NEW', 'PARTIALLY_EXECUTED')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_open_book', table_name='orders')
@@ -0,0 +1,68 @@
+"""Add balance locked amount and (user_id, ticker) unique constraint
+
+Revision ID: a4f7d2c8e915
+Revises: e2b86d5a3c19
+Create Date: 2026-10-17 15:21:06.532908
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f7d2c8e915'
+down_revision: Union[str, None] = 'e2b86d5a3c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубликаты (user_id, ticker) сливаются в одну строку перед уникальным ограничением
+    op.execute("""
+        UPDATE balance b SET amount = d.total
+        FROM (
+            SELECT min(id::text)::uuid AS id, sum(amount) AS total
+            FROM balance
+            GROUP BY user_id, ticker
+            HAVING count(*) > 1
+        ) d
+        WHERE b.id = d.id
+    """)
+    op.execute("""
+        DELETE FROM balance b
+        USING (
+            SELECT user_id, ticker, min(id::text)::uuid AS keep
+            FROM balance
+            GROUP BY user_id, ticker
+            HAVING count(*) > 1
+        ) d
+        WHERE b.user_id = d.user_id AND b.ticker = d.ticker AND b.id <> d.keep
+    """)
+    op.add_column('balance', sa.Column('locked', sa.Integer(), server_default='0', nullable=False))
+    op.create_unique_constraint('uq_balance_user_ticker', 'balance', ['user_id', 'ticker'])
+    op.drop_index(op.f('ix_balance_user_id'), table_name='balance')
+
+    # Резерв под уже стоящие в стакане лимитные заявки
+    op.execute("""
+        UPDATE balance b SET locked = r.locked
+        FROM (
+            SELECT
+                user_id,
+                CASE WHEN direction = 'BUY' THEN 'RUB' ELSE ticker END AS ticker,
+                sum(CASE WHEN direction = 'BUY' THEN (qty - filled) * price ELSE qty - filled END) AS locked
+            FROM orders
+            WHERE status IN ('NEW', 'PARTIALLY_EXECUTED') AND price IS NOT NULL
+            GROUP BY 1, 2
+        ) r
+        WHERE b.user_id = r.user_id AND b.ticker = r.ticker
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_balance_user_id'), 'balance', ['user_id'], unique=False)
+    op.drop_constraint('uq_balance_user_ticker', 'balance', type_='unique')
+    op.drop_column('balance', 'locked')
@@ -0,0 +1,101 @@
+"""Partition transactions by month on timestamp
+
+Revision ID: b9d2e6c4f183
+Revises: d8e5f1a3b720
+Create Date: 2026-10-17 16:48:12.903117
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d2e6c4f183'
+down_revision: Union[str, None] = 'd8e5f1a3b720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('transactions', 'transactions_legacy')
+    op.execute('ALTER INDEX transactions_pkey RENAME TO transactions_legacy_pkey')
+    op.drop_index('ix_transactions_ticker_timestamp', table_name='transactions_legacy')
+
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('buyer_id', sa.UUID(), nullable=True),
+    sa.Column('seller_id', sa.UUID(), nullable=True),
+    sa.Column('ticker', sa.String(length=10), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['buyer_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['ticker'], ['instruments.ticker'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'timestamp'),
+    postgresql_partition_by='RANGE (timestamp)'
+    )
+    op.create_index(
+        'ix_transactions_ticker_timestamp',
+        'transactions',
+        ['ticker', sa.text('timestamp DESC'), 'id'],
+        unique=False
+    )
+
+    # Секции с месяца самой старой сделки и на несколько месяцев вперёд,
+    # дальше их создаёт src.transactions.partitions
+    oldest = op.get_bind().scalar(sa.text('SELECT min(timestamp) FROM transactions_legacy'))
+    now = datetime.now(timezone.utc)
+    month = datetime((oldest or now).year, (oldest or now).month, 1, tzinfo=timezone.utc)
+    last = add_months(datetime(now.year, now.month, 1, tzinfo=timezone.utc), PARTITIONS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE transactions_y{month.year:04d}m{month.month:02d} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+    # Страховка на случай, если секции на будущее не созданы вовремя
+    op.execute('CREATE TABLE transactions_default PARTITION OF transactions DEFAULT')
+
+    op.execute('INSERT INTO transactions SELECT id, buyer_id, seller_id, ticker, amount, price, timestamp FROM transactions_legacy')
+    op.drop_table('transactions_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('transactions', 'transactions_partitioned')
+    op.execute('ALTER INDEX transactions_pkey RENAME TO transactions_partitioned_pkey')
+    op.execute('ALTER INDEX ix_transactions_ticker_timestamp RENAME TO ix_transactions_partitioned_ticker_timestamp')
+
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('buyer_id', sa.UUID(), nullable=True),
+    sa.Column('seller_id', sa.UUID(), nullable=True),
+    sa.Column('ticker', sa.String(length=10), nullable=False),
+    sa.Column('amount', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['buyer_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['ticker'], ['instruments.ticker'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO transactions SELECT id, buyer_id, seller_id, ticker, amount, price, timestamp FROM transactions_partitioned')
+    op.drop_table('transactions_partitioned')
+    op.create_index(
+        'ix_transactions_ticker_timestamp',
+        'transactions',
+        ['ticker', sa.text('timestamp DESC'), 'id'],
+        unique=False
+    )
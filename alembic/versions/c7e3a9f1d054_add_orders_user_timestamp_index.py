@@ -0,0 +1,30 @@
+"""Add orders (user_id, timestamp, id) index
+
+Revision ID: c7e3a9f1d054
+Revises: 9c41f0d6b27e
+Create Date: 2026-10-17 12:26:08.734190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e3a9f1d054'
+down_revision: Union[str, None] = '9c41f0d6b27e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_timestamp', 'orders', ['user_id', 'timestamp', 'id'], unique=False)
+    op.drop_index(op.f('ix_orders_user_id'), table_name='orders')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_orders_user_id'), 'orders', ['user_id'], unique=False)
+    op.drop_index('ix_orders_user_timestamp', table_name='orders')
@@ -0,0 +1,34 @@
+"""Add partial index on open orders by user
+
+Revision ID: d8e5f1a3b720
+Revises: a4f7d2c8e915
+Create Date: 2026-10-17 16:04:38.174290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e5f1a3b720'
+down_revision: Union[str, None] = 'a4f7d2c8e915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_orders_user_open',
+        'orders',
+        ['user_id', 'ticker', 'direction'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('NEW', 'PARTIALLY_EXECUTED')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_user_open', table_name='orders')
@@ -0,0 +1,33 @@
+"""Add transactions (ticker, timestamp DESC, id) index
+
+Revision ID: e2b86d5a3c19
+Revises: c7e3a9f1d054
+Create Date: 2026-10-17 13:02:51.417623
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b86d5a3c19'
+down_revision: Union[str, None] = 'c7e3a9f1d054'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_transactions_ticker_timestamp',
+        'transactions',
+        ['ticker', sa.text('timestamp DESC'), 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_ticker_timestamp', table_name='transactions')
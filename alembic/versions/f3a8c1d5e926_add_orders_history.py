@@ -0,0 +1,63 @@
+"""Move terminal orders to orders_history
+
+Revision ID: f3a8c1d5e926
+Revises: b9d2e6c4f183
+Create Date: 2026-10-17 18:05:41.226304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c1d5e926'
+down_revision: Union[str, None] = 'b9d2e6c4f183'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'id, user_id, ticker, direction, qty, price, filled, status, timestamp'
+TERMINAL = "status IN ('EXECUTED', 'CANCELLED')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('orders_history',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('ticker', sa.String(length=10), nullable=False),
+    sa.Column('direction', postgresql.ENUM(name='directionenum', create_type=False), nullable=False),
+    sa.Column('qty', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=True),
+    sa.Column('filled', sa.Integer(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='statusenum', create_type=False), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['ticker'], ['instruments.ticker'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f'INSERT INTO orders_history ({COLUMNS}) SELECT {COLUMNS} FROM orders WHERE {TERMINAL}')
+    op.execute(f'DELETE FROM orders WHERE {TERMINAL}')
+    op.create_index(
+        'ix_orders_history_user_timestamp',
+        'orders_history',
+        ['user_id', 'timestamp', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_orders_terminal',
+        'orders',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text(TERMINAL)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_terminal', table_name='orders')
+    op.execute(f'INSERT INTO orders ({COLUMNS}) SELECT {COLUMNS} FROM orders_history')
+    op.drop_index('ix_orders_history_user_timestamp', table_name='orders_history')
+    op.drop_table('orders_history')
@@ -0,0 +1,138 @@
+"""Прогрев стаканов при старте воркера на миллионе открытых заявок.
+
+Засевает --orders открытых лимитных заявок по --tickers бумагам через COPY
+и сравнивает загрузку:
+  * stream: один серверный курсор asyncpg по всем тикерам (src.orders.bootstrap);
+  * paged: постраничная загрузка по каждому тикеру и стороне (load_book, как было).
+
+RSS процесса растёт и после освобождения стаканов не возвращается, поэтому
+--modes stream и --modes paged честнее запускать отдельными процессами.
+Схема БД должна быть накатана (alembic upgrade head).
+
+    python -m bench.bootstrap --orders 1000000 --tickers 50 --output bench_output.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import time
+from datetime import datetime, timezone, timedelta
+from uuid import uuid4
+
+from bench.load import ticker_name
+from bench.stats import write_report
+
+
+def order_records(rng: random.Random, user_id: str, tickers: list[str], count: int):
+    # Покупки ниже продаж, чтобы засеянные заявки не пересекались
+    started = datetime.now(timezone.utc)
+    for index in range(count):
+        if index % 2:
+            direction, price = 'BUY', rng.randint(1, 1000)
+        else:
+            direction, price = 'SELL', rng.randint(1001, 2000)
+        yield (
+            uuid4(), user_id, rng.choice(tickers), direction, rng.randint(1, 100), price, 0, 'NEW',
+            started + timedelta(microseconds=index)
+        )
+
+async def seed(tickers: list[str], count: int) -> str:
+    from sqlalchemy.dialects.postgresql import insert
+    from src.database import new_async_session
+    from src.instruments.models import InstrumentModel
+    from src.users.models import UserModel, RoleEnum
+    from src.users.utils import generate_api_key
+
+    user_id = str(uuid4())
+    rng = random.Random(0)
+    async with new_async_session() as session:
+        session.add(UserModel(id=user_id, name='bench-bootstrap', role=RoleEnum.USER, api_key=generate_api_key()))
+        await session.execute(
+            insert(InstrumentModel)
+            .values([{'name': ticker, 'ticker': ticker, 'user_id': user_id} for ticker in tickers])
+            .on_conflict_do_nothing()
+        )
+        await session.flush()
+
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            'orders',
+            records=order_records(rng, user_id, tickers, count),
+            columns=['id', 'user_id', 'ticker', 'direction', 'qty', 'price', 'filled', 'status', 'timestamp']
+        )
+        await session.commit()
+    return user_id
+
+async def cleanup(user_id: str):
+    from sqlalchemy import delete
+    from src.database import new_async_session
+    from src.users.models import UserModel
+
+    async with new_async_session() as session:
+        # Заявки и засеянные инструменты удаляются каскадом вместе с пользователем
+        await session.execute(delete(UserModel).where(UserModel.id == user_id))
+        await session.commit()
+
+async def load_stream(tickers: set[str]) -> int:
+    from src.database import new_async_session
+    from src.orders.bootstrap import stream_books
+
+    async with new_async_session() as session:
+        books = await stream_books(session, lambda ticker: ticker in tickers)
+    return sum(len(book) for book in books.values())
+
+async def load_paged(tickers: set[str]) -> int:
+    from sqlalchemy import select
+    from src.database import new_async_session
+    from src.instruments.models import InstrumentModel
+    from src.orders.engine import load_book
+
+    async with new_async_session() as session:
+        seqs = (await session.execute(select(InstrumentModel.ticker, InstrumentModel.book_seq))).all()
+        books = [await load_book(session, ticker, seq) for ticker, seq in seqs if ticker in tickers]
+    return sum(len(book) for book in books)
+
+async def run(args) -> dict:
+    from src.orders.bootstrap import rss_bytes
+
+    tickers = [ticker_name(1000 + index) for index in range(args.tickers)]
+    seeded = time.perf_counter()
+    user_id = await seed(tickers, args.orders)
+    results = {'seed_s': round(time.perf_counter() - seeded, 3)}
+    try:
+        for mode in args.modes:
+            load = load_stream if mode == 'stream' else load_paged
+            gc.collect()
+            rss_before = rss_bytes()
+            started = time.perf_counter()
+            orders = await load(set(tickers))
+            elapsed = time.perf_counter() - started
+            results[mode] = {
+                'orders': orders,
+                'seconds': round(elapsed, 3),
+                'orders_per_s': round(orders / elapsed),
+                'rss_delta_mb': round((rss_bytes() - rss_before) / 2 ** 20, 1),
+            }
+    finally:
+        if not args.keep:
+            await cleanup(user_id)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--tickers', type=int, default=50)
+    parser.add_argument('--modes', nargs='+', choices=['stream', 'paged'], default=['stream', 'paged'])
+    parser.add_argument('--keep', action='store_true', help='keep seeded orders after the run')
+    parser.add_argument('--output', default='bench_output.json')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report = write_report(args.output, vars(args), {'results': results})
+    print(json.dumps(report['results'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
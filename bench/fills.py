@@ -0,0 +1,122 @@
+"""Накладные расходы на одну сделку при заявке, пересекающей 1, 10, 100 и 1000 заявок стакана.
+
+Для каждого размера прогона:
+  * end-to-end: мейкер выставляет N продаж по одной бумаге, тейкер одной покупкой
+    забирает их все; время заявки делится на N;
+  * запись сделок: N строк transactions пишутся в откатываемой транзакции
+    по одной через ORM (как было), одним INSERT (insertmanyvalues) и через COPY.
+
+Схема БД должна быть накатана (alembic upgrade head).
+
+    python -m bench.fills --sizes 1 10 100 1000 --repeat 3 --output bench_output.json
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from bench.load import create_admin_key, make_client, ticker_name
+from bench.stats import write_report
+
+
+async def create_user(client, admin: dict, name: str, deposits: dict[str, int]) -> tuple[str, dict]:
+    user = (await client.post('/api/v1/public/register', json={'name': name})).json()
+    for ticker, amount in deposits.items():
+        await client.post(
+            '/api/v1/admin/balance/deposit',
+            json={'user_id': user['id'], 'ticker': ticker, 'amount': amount},
+            headers=admin
+        )
+    return user['id'], {'Authorization': f"TOKEN {user['api_key']}"}
+
+async def crossing_order(client, admin: dict, ticker: str, size: int, price: int) -> float:
+    _, maker = await create_user(client, admin, 'bench-maker', {ticker: size})
+    _, taker = await create_user(client, admin, 'bench-taker', {'RUB': size * price})
+    orders = [{'direction': 'SELL', 'ticker': ticker, 'qty': 1, 'price': price}] * size
+    for start in range(0, size, 500):
+        response = await client.post('/api/v1/order/batch', json=orders[start:start + 500], headers=maker)
+        response.raise_for_status()
+
+    started = time.perf_counter()
+    response = await client.post(
+        '/api/v1/order',
+        json={'direction': 'BUY', 'ticker': ticker, 'qty': size, 'price': price},
+        headers=taker
+    )
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed
+
+async def write_strategies(user_id: str, ticker: str, size: int) -> dict[str, float]:
+    from src.database import new_async_session
+    from src.transactions.bulk import TradeRow, insert_trades, copy_trades
+    from src.transactions.models import TransactionModel
+
+    timestamp = datetime.now(timezone.utc)
+    trades = [TradeRow(uuid4(), user_id, user_id, ticker, 1, 10, timestamp) for _ in range(size)]
+
+    async def orm(session):
+        for trade in trades:
+            session.add(TransactionModel(**trade._asdict()))
+        await session.flush()
+
+    timings = {}
+    for name, write in (('orm', orm), ('insert', insert_trades), ('copy', copy_trades)):
+        async with new_async_session() as session:
+            await session.connection()
+            started = time.perf_counter()
+            if name == 'orm':
+                await write(session)
+            else:
+                await write(session, trades)
+            timings[name] = time.perf_counter() - started
+            await session.rollback()
+    return timings
+
+async def run(args) -> dict:
+    admin_key = args.admin_key or await create_admin_key()
+    admin = {'Authorization': f'TOKEN {admin_key}'}
+    results = {}
+    async with make_client(args.url) as client:
+        tickers = ['RUB'] + [ticker_name(500 + index) for index in range(len(args.sizes) * args.repeat)]
+        for ticker in tickers:
+            await client.post('/api/v1/admin/instrument', json={'name': ticker, 'ticker': ticker}, headers=admin)
+        writer_id, _ = await create_user(client, admin, 'bench-writer', {})
+
+        for index, size in enumerate(args.sizes):
+            order_times = []
+            writes = {'orm': [], 'insert': [], 'copy': []}
+            for attempt in range(args.repeat):
+                ticker = tickers[1 + index * args.repeat + attempt]
+                order_times.append(await crossing_order(client, admin, ticker, size, args.price))
+                if args.url is None:
+                    for name, elapsed in (await write_strategies(writer_id, ticker, size)).items():
+                        writes[name].append(elapsed)
+
+            result = {'order_ms': min(order_times) * 1000, 'per_fill_us': min(order_times) / size * 1e6}
+            for name, timings in writes.items():
+                if timings:
+                    result[f'write_{name}_per_fill_us'] = min(timings) / size * 1e6
+            results[str(size)] = result
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='base URL of a running server; the app runs in-process if omitted')
+    parser.add_argument('--admin-key', help='admin API key; a bench admin is created in the DB if omitted')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--price', type=int, default=10)
+    parser.add_argument('--output', default='bench_output.json')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    config = {key: value for key, value in vars(args).items() if key != 'admin_key'}
+    report = write_report(args.output, config, {'results': results})
+    print(json.dumps(report['results'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
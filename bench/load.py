@@ -0,0 +1,163 @@
+"""Нагрузочный прогон торгового API.
+
+Сценарий: регистрация пользователей -> пополнение балансов админом ->
+конкурентные лимитные и рыночные заявки вперемешку с чтением стакана и ленты сделок.
+Схема БД должна быть накатана (alembic upgrade head).
+
+    python -m bench.load --concurrency 32 --tickers 4 --orders 5000 --output bench_output.json
+
+Без --url приложение из src.main поднимается в процессе через ASGITransport,
+с --url нагрузка идёт на запущенный сервер (например, gunicorn с несколькими воркерами).
+"""
+import argparse
+import asyncio
+import random
+import string
+import time
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+
+from bench.stats import Recorder, write_report
+
+
+def ticker_name(index: int) -> str:
+    letters = string.ascii_uppercase
+    return 'BN' + letters[index // 26 % 26] + letters[index % 26]
+
+async def create_admin_key() -> str:
+    from src.database import new_async_session
+    from src.users.models import UserModel, RoleEnum
+    from src.users.utils import generate_api_key
+
+    api_key = generate_api_key()
+    async with new_async_session() as session:
+        session.add(UserModel(name=f'bench-admin-{uuid4().hex[:8]}', role=RoleEnum.ADMIN, api_key=api_key))
+        await session.commit()
+    return api_key
+
+@asynccontextmanager
+async def make_client(url: str | None):
+    if url:
+        async with AsyncClient(base_url=url, timeout=60) as client:
+            yield client
+        return
+
+    from src.main import app, lifespan
+    from src.monitoring.readiness import readiness
+
+    async with lifespan(app):
+        await readiness.wait()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url='http://bench', timeout=60) as client:
+            yield client
+
+async def setup(client: AsyncClient, args, admin_key: str) -> tuple[list[str], list[str]]:
+    admin = {'Authorization': f'TOKEN {admin_key}'}
+    tickers = [ticker_name(index) for index in range(args.tickers)]
+    # Балансы ссылаются на инструменты, поэтому RUB тоже должен существовать; повторное создание игнорируется
+    for ticker in ['RUB', *tickers]:
+        await client.post('/api/v1/admin/instrument', json={'name': ticker, 'ticker': ticker}, headers=admin)
+
+    keys = []
+    for index in range(args.users):
+        response = await client.post('/api/v1/public/register', json={'name': f'bench-user-{index}'})
+        response.raise_for_status()
+        user = response.json()
+        keys.append(user['api_key'])
+        for ticker in ['RUB', *tickers]:
+            await client.post(
+                '/api/v1/admin/balance/deposit',
+                json={'user_id': user['id'], 'ticker': ticker, 'amount': args.deposit},
+                headers=admin
+            )
+    return tickers, keys
+
+async def trader(client: AsyncClient, recorder: Recorder, args, tickers: list[str], keys: list[str], budget: list[int]):
+    rng = random.Random()
+    while budget[0] > 0:
+        budget[0] -= 1
+        ticker = rng.choice(tickers)
+        headers = {'Authorization': f'TOKEN {rng.choice(keys)}'}
+        roll = rng.random()
+
+        if roll < args.read_ratio / 2:
+            await recorder.call('GET orderbook', client.get(f'/api/v1/public/orderbook/{ticker}'))
+        elif roll < args.read_ratio:
+            await recorder.call('GET transactions', client.get(f'/api/v1/public/transactions/{ticker}?limit=20'))
+        elif roll < args.read_ratio + args.market_ratio:
+            body = {'direction': rng.choice(['BUY', 'SELL']), 'ticker': ticker, 'qty': rng.randint(1, 5)}
+            await recorder.call('POST order market', client.post('/api/v1/order', json=body, headers=headers))
+        else:
+            body = {
+                'direction': rng.choice(['BUY', 'SELL']),
+                'ticker': ticker,
+                'qty': rng.randint(1, 10),
+                'price': rng.randint(args.price - args.spread, args.price + args.spread),
+            }
+            await recorder.call('POST order limit', client.post('/api/v1/order', json=body, headers=headers))
+
+async def run(args) -> dict:
+    admin_key = args.admin_key or await create_admin_key()
+    recorder = Recorder()
+
+    async with make_client(args.url) as client:
+        tickers, keys = await setup(client, args, admin_key)
+
+        budget = [args.orders]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            trader(client, recorder, args, tickers, keys, budget)
+            for _ in range(args.concurrency)
+        ))
+        duration = time.perf_counter() - started
+
+    endpoints = recorder.summary()
+    orders = sum(
+        stats['count'] - stats['errors'] - stats['rejected']
+        for name, stats in endpoints.items()
+        if name.startswith('POST order')
+    )
+    requests = sum(stats['count'] for stats in endpoints.values())
+    return {
+        'duration_s': duration,
+        'requests': requests,
+        'requests_per_sec': requests / duration,
+        'orders_per_sec': orders / duration,
+        'conflicts': recorder.conflicts,
+        'conflict_rate': recorder.conflicts / requests if requests else 0.0,
+        'error_rate': sum(stats['errors'] for stats in endpoints.values()) / requests if requests else 0.0,
+        'endpoints': endpoints,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Trading API load benchmark')
+    parser.add_argument('--url', help='base URL of a running server; in-process ASGI app if omitted')
+    parser.add_argument('--admin-key', help='admin API key; a bench admin is created in the DB if omitted')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--tickers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--orders', type=int, default=2000, help='total number of requests in the mix')
+    parser.add_argument('--read-ratio', type=float, default=0.2)
+    parser.add_argument('--market-ratio', type=float, default=0.1)
+    parser.add_argument('--price', type=int, default=100)
+    parser.add_argument('--spread', type=int, default=5)
+    parser.add_argument('--deposit', type=int, default=10_000_000)
+    parser.add_argument('--output', default='bench_output.json')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    config = {key: value for key, value in vars(args).items() if key != 'admin_key'}
+    write_report(args.output, config, results)
+
+    print(f"{results['orders_per_sec']:.1f} orders/s, {results['requests_per_sec']:.1f} req/s, "
+          f"conflicts {results['conflicts']}, error rate {results['error_rate']:.2%}")
+    for name, stats in results['endpoints'].items():
+        print(f"  {name:<20} n={stats['count']:<6} p50={stats['p50_ms']:.1f}ms "
+              f"p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms errors={stats['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Процессорное время на сериализацию списка заявок и разбор тел заявок.
+
+Сравнивает прежний путь (ORM-подобные объекты -> схемы с валидацией ->
+повторная валидация response_model -> JSON, тела через Union без дискриминатора)
+с текущим (строки -> model_construct -> TypeAdapter.dump_json, дискриминированный Union).
+БД не нужна.
+
+    python -m bench.serialization --orders 10000 --output bench_output.json
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+from typing import Union
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from bench.stats import write_report
+from src.orders.models import DirectionEnum, StatusEnum
+from src.orders.router import order_to_schema
+from src.orders.schemas import (
+    OrderBodySchema,
+    OrderResponseSchema,
+    LimitOrderSchema,
+    LimitOrderBodySchema,
+    MarketOrderSchema,
+    MarketOrderBodySchema,
+    orders_adapter,
+)
+
+
+legacy_body_adapter = TypeAdapter(Union[LimitOrderBodySchema, MarketOrderBodySchema])
+body_adapter = TypeAdapter(OrderBodySchema)
+response_adapter = TypeAdapter(list[OrderResponseSchema])
+
+
+def make_rows(count: int) -> list[SimpleNamespace]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    user_id = uuid4()
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            status=random.choice(list(StatusEnum)),
+            user_id=user_id,
+            timestamp=start + timedelta(milliseconds=index),
+            direction=random.choice(list(DirectionEnum)),
+            ticker='MEMCOIN',
+            qty=random.randint(1, 100),
+            price=random.randint(1, 1000) if index % 4 else None,
+            filled=0
+        )
+        for index in range(count)
+    ]
+
+def make_bodies(count: int) -> list[dict]:
+    bodies = []
+    for index in range(count):
+        body = {'direction': random.choice(['BUY', 'SELL']), 'ticker': 'MEMCOIN', 'qty': random.randint(1, 100)}
+        if index % 4:
+            body['price'] = random.randint(1, 1000)
+        bodies.append(body)
+    return bodies
+
+
+def legacy_order_to_schema(order):
+    body_data = {'direction': order.direction, 'ticker': order.ticker, 'qty': order.qty}
+    if order.price is not None:
+        return LimitOrderSchema(
+            id=order.id,
+            user_id=order.user_id,
+            status=order.status,
+            timestamp=order.timestamp,
+            filled=order.filled,
+            body=LimitOrderBodySchema(**body_data, price=order.price)
+        )
+    return MarketOrderSchema(
+        id=order.id,
+        user_id=order.user_id,
+        status=order.status,
+        timestamp=order.timestamp,
+        body=MarketOrderBodySchema(**body_data)
+    )
+
+def legacy_list(rows) -> bytes:
+    # Так FastAPI обрабатывал возвращённые схемы: валидация по response_model, jsonable_encoder, json.dumps
+    orders = [legacy_order_to_schema(row) for row in rows]
+    validated = response_adapter.validate_python(orders, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+def fast_list(rows) -> bytes:
+    return orders_adapter.dump_json([order_to_schema(row) for row in rows])
+
+def legacy_bodies(bodies):
+    return [legacy_body_adapter.validate_python(body) for body in bodies]
+
+def fast_bodies(bodies):
+    return [body_adapter.validate_python(body) for body in bodies]
+
+
+def cpu_time(func, data, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        func(data)
+        best = min(best, time.process_time() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='bench_output.json')
+    args = parser.parse_args()
+
+    rows = make_rows(args.orders)
+    bodies = make_bodies(args.orders)
+    scale = 10000 / args.orders
+
+    results = {}
+    for name, legacy, fast, data in (
+        ('order_list', legacy_list, fast_list, rows),
+        ('order_body', legacy_bodies, fast_bodies, bodies),
+    ):
+        before = cpu_time(legacy, data, args.repeat) * scale
+        after = cpu_time(fast, data, args.repeat) * scale
+        results[name] = {
+            'before_cpu_ms_per_10k': before * 1000,
+            'after_cpu_ms_per_10k': after * 1000,
+            'speedup': before / after if after else 0.0,
+        }
+
+    report = write_report(args.output, vars(args), {'results': results})
+    print(json.dumps(report['results'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import json
+import subprocess
+import time
+from collections import defaultdict, Counter
+from datetime import datetime, timezone
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.conflicts = 0
+
+    async def call(self, name: str, request):
+        started = time.perf_counter()
+        response = await request
+        self.latencies[name].append(time.perf_counter() - started)
+        self.statuses[name][response.status_code] += 1
+        # Дедлоки и таймауты блокировок повторяются сервером и доходят до клиента как 409
+        if response.status_code == 409 and 'concurrent update conflict' in response.text.lower():
+            self.conflicts += 1
+        return response
+
+    def summary(self) -> dict:
+        endpoints = {}
+        for name, latencies in sorted(self.latencies.items()):
+            statuses = self.statuses[name]
+            errors = sum(count for code, count in statuses.items() if code >= 500)
+            rejected = sum(count for code, count in statuses.items() if 400 <= code < 500)
+            endpoints[name] = {
+                'count': len(latencies),
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+                'errors': errors,
+                'error_rate': errors / len(latencies),
+                'rejected': rejected,
+                'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            }
+        return endpoints
+
+
+def write_report(path: str, config: dict, results: dict):
+    report = {
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'config': config,
+        **results,
+    }
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+    return report
@@ -0,0 +1,21 @@
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    # По умолчанию каждый воркер владеет своим шардом тикеров: иначе заявка чаще всего
+    # попадает в воркер с отставшим стаканом и перечитывает его из БД
+    os.environ.setdefault('ORDER_SHARDS', str(server.cfg.workers))
+
+    # Файлы метрик прошлого запуска удаляются, иначе счётчики продолжат старые значения
+    path = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
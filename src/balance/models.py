@@ -1,6 +1,6 @@
 from uuid import uuid4
 
-from sqlalchemy import String, Integer, ForeignKey
+from sqlalchemy import String, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -9,6 +9,9 @@ from src.database import Base
 
 class BalanceModel(Base):
     __tablename__ = 'balance'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'ticker', name='uq_balance_user_ticker'),
+    )
 
     id: Mapped[str] = mapped_column(
         UUID,
@@ -19,7 +22,6 @@ class BalanceModel(Base):
     user_id: Mapped[str] = mapped_column(
         UUID,
         ForeignKey('users.id', ondelete='CASCADE'),
-        index=True,
         nullable=False
     )
 
@@ -32,4 +34,11 @@ class BalanceModel(Base):
     amount: Mapped[int] = mapped_column(
         Integer,
         nullable=False
-    )
\ No newline at end of file
+    )
+
+    locked: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default='0'
+    )
@@ -1,33 +1,43 @@
+from typing import Union
+
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy import select
 
 from src.database import SessionDep
 from src.balance.models import BalanceModel
 from src.users.models import UserModel
-from src.balance.schemas import BalanceSchema
+from src.users.cache import UserIdentity
+from src.balance.schemas import BalanceSchema, BalanceDetailSchema
+from src.balance.settlement import Settlement
 from src.users.dependencies import get_current_admin, get_current_user
 from src.schemas import OkResponseSchema
 
 
 balance_router = APIRouter()
 
-@balance_router.get('/api/v1/balance', response_model=dict[str, int], tags=['balance'])
+@balance_router.get('/api/v1/balance', response_model=Union[dict[str, int], dict[str, BalanceDetailSchema]], tags=['balance'])
 async def get_balances(
     session: SessionDep,
-    current_user: UserModel = Depends(get_current_user)
+    current_user: UserIdentity = Depends(get_current_user),
+    detailed: bool = False
 ):
-    balances = await session.scalars(
-        select(BalanceModel)
+    balances = await session.execute(
+        select(BalanceModel.ticker, BalanceModel.amount, BalanceModel.locked)
         .where(BalanceModel.user_id == current_user.id)
     )
 
-    return {balance.ticker: int(balance.amount) for balance in balances.all()}
+    if detailed:
+        return {
+            ticker: BalanceDetailSchema(available=amount - locked, locked=locked)
+            for ticker, amount, locked in balances.all()
+        }
+    return {ticker: int(amount) for ticker, amount, _ in balances.all()}
 
 @balance_router.post('/api/v1/admin/balance/deposit', response_model=OkResponseSchema, tags=['admin', 'balance'])
 async def deposit_balance(
     balance_data: BalanceSchema, 
     session: SessionDep,
-    current_admin: UserModel = Depends(get_current_admin)
+    current_admin: UserIdentity = Depends(get_current_admin)
 ):
     user = await session.scalar(
         select(UserModel).where(UserModel.id == balance_data.user_id)
@@ -39,23 +49,10 @@ async def deposit_balance(
             detail="User not found"
         )
 
-    balance = await session.scalar(
-        select(BalanceModel).where(
-            BalanceModel.user_id == balance_data.user_id,
-            BalanceModel.ticker == balance_data.ticker
-        )
-    )
-    
-    if balance:
-        balance.amount += balance_data.amount
-    else:
-        balance = BalanceModel(
-            user_id=balance_data.user_id,
-            ticker=balance_data.ticker,
-            amount=balance_data.amount
-        )
-        session.add(balance)
-
+    # Строка баланса создаётся или увеличивается одним upsert, без гонки между чтением и вставкой
+    settlement = Settlement()
+    settlement.add(balance_data.user_id, balance_data.ticker, balance_data.amount)
+    await settlement.apply(session)
     await session.commit()
 
     return {'success': True}
@@ -64,7 +61,7 @@ async def deposit_balance(
 async def withdraw_balance(
     balance_data: BalanceSchema,
     session: SessionDep,
-    current_admin: UserModel = Depends(get_current_admin)
+    current_admin: UserIdentity = Depends(get_current_admin)
 ):
     user = await session.scalar(
         select(UserModel)
@@ -83,6 +80,7 @@ async def withdraw_balance(
             BalanceModel.user_id == balance_data.user_id,
             BalanceModel.ticker == balance_data.ticker
         )
+        .with_for_update()
     )
     
     if not balance:
@@ -91,7 +89,7 @@ async def withdraw_balance(
             detail=f"No balance found for ticker {balance_data.ticker}"
         )
 
-    if balance.amount < balance_data.amount:
+    if balance.amount - balance.locked < balance_data.amount:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Insufficient balance for withdrawal"
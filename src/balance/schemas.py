@@ -7,5 +7,9 @@ class BalanceSchema(BaseModel):
     ticker: str
     amount: int = Field(gt=0)
 
+class BalanceDetailSchema(BaseModel):
+    available: int
+    locked: int
+
 class GetBalanceResponseSchema(RootModel[dict[str, int]]):
     pass
\ No newline at end of file
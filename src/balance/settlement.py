@@ -0,0 +1,130 @@
+import time
+from collections import defaultdict
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.balance.models import BalanceModel
+from src.monitoring.metrics import LOCK_WAIT
+from src.orders.models import DirectionEnum
+
+
+def reservation(direction: DirectionEnum, ticker: str, qty: int, price: int) -> tuple[str, int]:
+    """Что резервирует лимитная заявка на qty: рубли под покупку или бумаги под продажу."""
+    if direction == DirectionEnum.BUY:
+        return 'RUB', qty * price
+    return ticker, qty
+
+
+class Settlement:
+    """Изменения балансов по всем сделкам одной заявки.
+
+    Дельты суммы (amount) и резерва (locked) копятся по парам (user_id, ticker)
+    и записываются одним INSERT ... ON CONFLICT DO UPDATE в порядке (user_id, ticker).
+    Проверяются только строки, у которых уменьшается доступный остаток
+    amount - locked: мейкеры платят из своего резерва и повторно не проверяются.
+    """
+
+    def __init__(self):
+        self.deltas: dict[tuple[str, str], int] = defaultdict(int)
+        self.locks: dict[tuple[str, str], int] = defaultdict(int)
+
+    def add(self, user_id: UUID, ticker: str, delta: int):
+        self.deltas[(str(user_id), ticker)] += delta
+
+    def lock(self, user_id: UUID, ticker: str, delta: int):
+        self.locks[(str(user_id), ticker)] += delta
+
+    def transfer(self, buyer_id: UUID, seller_id: UUID, ticker: str, qty: int, price: int):
+        self.add(buyer_id, 'RUB', -qty * price)
+        self.add(seller_id, 'RUB', qty * price)
+        self.add(buyer_id, ticker, qty)
+        self.add(seller_id, ticker, -qty)
+
+    def reserve(self, user_id: UUID, direction: DirectionEnum, ticker: str, qty: int, price: int):
+        self.lock(user_id, *reservation(direction, ticker, qty, price))
+
+    def release(self, user_id: UUID, direction: DirectionEnum, ticker: str, qty: int, price: int):
+        reserved_ticker, amount = reservation(direction, ticker, qty, price)
+        self.lock(user_id, reserved_ticker, -amount)
+
+    def merge(self, other: 'Settlement'):
+        for key, delta in other.deltas.items():
+            self.deltas[key] += delta
+        for key, delta in other.locks.items():
+            self.locks[key] += delta
+
+    def require(self, available: dict[tuple[str, str], int]):
+        """Проверяет изменения по известным остаткам и списывает их из available."""
+        for key in self.checked():
+            if available.get(key, 0) + self.deltas.get(key, 0) - self.locks.get(key, 0) < 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient balance for {key[1]}"
+                )
+        for key in self.keys():
+            available[key] = available.get(key, 0) + self.deltas.get(key, 0) - self.locks.get(key, 0)
+
+    def keys(self) -> list[tuple[str, str]]:
+        return sorted(
+            key for key in self.deltas.keys() | self.locks.keys()
+            if self.deltas.get(key, 0) or self.locks.get(key, 0)
+        )
+
+    def checked(self) -> set[tuple[str, str]]:
+        return {key for key in self.keys() if self.deltas.get(key, 0) - self.locks.get(key, 0) < 0}
+
+    async def apply(self, session: AsyncSession, check: bool = True):
+        keys = self.keys()
+        if not keys:
+            return
+
+        statement = insert(BalanceModel).values([
+            {
+                'user_id': user_id,
+                'ticker': ticker,
+                'amount': self.deltas.get((user_id, ticker), 0),
+                'locked': self.locks.get((user_id, ticker), 0),
+            }
+            for user_id, ticker in keys
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[BalanceModel.user_id, BalanceModel.ticker],
+            set_={
+                'amount': BalanceModel.amount + statement.excluded.amount,
+                'locked': BalanceModel.locked + statement.excluded.locked,
+            }
+        ).returning(BalanceModel.user_id, BalanceModel.ticker, BalanceModel.amount - BalanceModel.locked)
+
+        started = time.perf_counter()
+        rows = (await session.execute(statement)).all()
+        LOCK_WAIT.labels('balance').observe(time.perf_counter() - started)
+
+        if not check:
+            return
+        # Проверка по итоговым значениям: при нехватке транзакция откатывается целиком
+        ticker = self.insufficient(rows)
+        if ticker is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient balance for {ticker}"
+            )
+
+    def insufficient(self, rows) -> Optional[str]:
+        checked = self.checked()
+        for user_id, ticker, available in sorted(rows, key=lambda row: (str(row[0]), row[1])):
+            if (str(user_id), ticker) in checked and available < 0:
+                return ticker
+        return None
+
+
+async def available_balances(session: AsyncSession, user_id: UUID) -> dict[tuple[str, str], int]:
+    rows = await session.execute(
+        select(BalanceModel.ticker, BalanceModel.amount - BalanceModel.locked)
+        .where(BalanceModel.user_id == user_id)
+    )
+    return {(str(user_id), ticker): available for ticker, available in rows.all()}
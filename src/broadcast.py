@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Callable, Optional
+
+import asyncpg
+
+from src.database import DATABASE_URL, DB_BROADCAST
+
+
+logger = logging.getLogger(__name__)
+
+DB_BROADCAST_RECONNECT_DELAY = float(os.getenv('DB_BROADCAST_RECONNECT_DELAY', '1'))
+
+# Ограничение PostgreSQL на размер payload у NOTIFY
+NOTIFY_PAYLOAD_LIMIT = 7999
+
+NOTIFY_BATCH_SQL = 'SELECT pg_notify(channel, payload) FROM unnest($1::text[], $2::text[]) AS t(channel, payload)'
+
+
+class Broadcast:
+    """Рассылка сообщений между воркерами через LISTEN/NOTIFY PostgreSQL.
+
+    Каждый воркер держит одно выделенное соединение: на нём он слушает каналы
+    и пачками отправляет накопившиеся уведомления. Свои уведомления воркер
+    не получает. После переподключения вызываются обработчики on_reconnect:
+    уведомления, пришедшие без соединения, потеряны.
+    """
+
+    def __init__(self, enabled: bool = DB_BROADCAST, dsn: str = DATABASE_URL):
+        self.enabled = enabled
+        self.dsn = dsn.replace('+asyncpg', '', 1)
+        self._handlers: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+        self._reconnect_handlers: list[Callable[[], None]] = []
+        self._connection: Optional[asyncpg.Connection] = None
+        self._pending: list[tuple[str, str]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    def listen(self, channel: str, handler: Callable[[str], None]):
+        self._handlers[channel].append(handler)
+
+    def on_reconnect(self, handler: Callable[[], None]):
+        self._reconnect_handlers.append(handler)
+
+    def send(self, channel: str, payload: str):
+        # Отправка не ждёт БД: уведомления уходят пачкой следующим запросом
+        if self._connection is None or self._connection.is_closed():
+            return
+        self._pending.append((channel, payload))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+
+    async def start(self):
+        if not self.enabled:
+            return
+        await self._connect()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in (self._runner, self._flusher):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._runner = self._flusher = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def _connect(self):
+        connection = await asyncpg.connect(self.dsn, server_settings={'application_name': f'broadcast-{os.getpid()}'})
+        own_pid = connection.get_server_pid()
+
+        def deliver(_, pid, channel, payload):
+            if pid == own_pid:
+                return
+            for handler in self._handlers[channel]:
+                try:
+                    handler(payload)
+                except Exception:
+                    logger.exception('Broadcast handler for %s failed', channel)
+
+        for channel in self._handlers:
+            await connection.add_listener(channel, deliver)
+        self._connection = connection
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(DB_BROADCAST_RECONNECT_DELAY)
+            if not self._connection.is_closed():
+                continue
+            logger.warning('Broadcast connection lost, reconnecting')
+            try:
+                await self._connect()
+            except (OSError, asyncpg.PostgresError):
+                logger.exception('Broadcast reconnect failed')
+                continue
+            for handler in self._reconnect_handlers:
+                handler()
+
+    async def _flush(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await self._connection.execute(
+                    NOTIFY_BATCH_SQL, [channel for channel, _ in batch], [payload for _, payload in batch]
+                )
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.exception('Failed to send %d broadcast messages', len(batch))
+
+
+broadcast = Broadcast()
@@ -1,17 +1,106 @@
 from typing import Annotated
 import os
+import time
 
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from fastapi import Depends
 
 
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+def env_bool(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://birzha:birzha@db:5432/birzha")
 if DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Соединения делятся между воркерами gunicorn так, чтобы в сумме не превысить max_connections
+WEB_CONCURRENCY = env_int("WEB_CONCURRENCY", 4)
+DB_MAX_CONNECTIONS = env_int("DB_MAX_CONNECTIONS", 100)
+DB_RESERVED_CONNECTIONS = env_int("DB_RESERVED_CONNECTIONS", 10)
+# Каждый воркер держит вне пула одно соединение LISTEN/NOTIFY (src/broadcast.py)
+DB_BROADCAST = env_bool("DB_BROADCAST", WEB_CONCURRENCY > 1)
+DB_WORKER_CONNECTIONS = max(2, (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) // WEB_CONCURRENCY - DB_BROADCAST)
+
+DB_POOL_SIZE = env_int("DB_POOL_SIZE", max(1, DB_WORKER_CONNECTIONS * 3 // 4))
+DB_MAX_OVERFLOW = env_int("DB_MAX_OVERFLOW", DB_WORKER_CONNECTIONS - DB_POOL_SIZE)
+DB_POOL_TIMEOUT = env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE = env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_CACHE_SIZE = env_int("DB_STATEMENT_CACHE_SIZE", 500)
+DB_STATEMENT_TIMEOUT_MS = env_int("DB_STATEMENT_TIMEOUT_MS", 10000)
+DB_LOCK_TIMEOUT_MS = env_int("DB_LOCK_TIMEOUT_MS", 5000)
+DB_ECHO = env_bool("DB_ECHO")
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def record(self, wait: float):
+        self.checkouts += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            pool_stats.record(time.perf_counter() - started)
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=DB_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={
+        'prepared_statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+        'server_settings': {
+            'statement_timeout': str(DB_STATEMENT_TIMEOUT_MS),
+            'lock_timeout': str(DB_LOCK_TIMEOUT_MS),
+        },
+    },
+)
+
+def pool_status() -> dict:
+    pool = engine.sync_engine.pool
+    capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'checked_out': pool.checkedout(),
+        'overflow': max(0, pool.overflow()),
+        'saturation': pool.checkedout() / capacity if capacity else 0.0,
+        'checkouts': pool_stats.checkouts,
+        'checkout_wait_seconds_total': pool_stats.wait_total,
+        'checkout_wait_seconds_max': pool_stats.wait_max,
+        'checkout_timeouts': pool_stats.timeouts,
+    }
 
 new_async_session = async_sessionmaker(engine, expire_on_commit=False)
 
@@ -22,4 +111,4 @@ async def get_session():
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
@@ -1,6 +1,6 @@
 from uuid import uuid4
 
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -31,4 +31,11 @@ class InstrumentModel(Base):
         UUID,
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False
+    )
+
+    book_seq: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        server_default='0'
     )
\ No newline at end of file
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from src.broadcast import broadcast
+from src.database import new_async_session
+from src.instruments.models import InstrumentModel
+from src.instruments.schemas import InstrumentCreateSchema
+
+
+instruments_adapter = TypeAdapter(list[InstrumentCreateSchema])
+
+
+@dataclass(frozen=True, slots=True)
+class InstrumentSnapshot:
+    names: dict[str, str]
+    body: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, names: dict[str, str]) -> 'InstrumentSnapshot':
+        names = dict(sorted(names.items()))
+        body = instruments_adapter.dump_json([
+            InstrumentCreateSchema.model_construct(name=name, ticker=ticker)
+            for ticker, name in names.items()
+        ])
+        return cls(names, body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"')
+
+
+class InstrumentRegistry:
+    """Инструменты в памяти воркера.
+
+    Снимок неизменяемый и подменяется целиком, поэтому читатели не видят
+    промежуточных состояний. Изменения из других воркеров подхватываются
+    перечитыванием раз в ttl секунд и при промахе по тикеру.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: InstrumentSnapshot | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def load(self):
+        async with self._lock:
+            async with new_async_session() as session:
+                rows = await session.execute(select(InstrumentModel.ticker, InstrumentModel.name))
+            self._set(InstrumentSnapshot.build(dict(rows.all())))
+
+    def _set(self, snapshot: InstrumentSnapshot):
+        self._snapshot = snapshot
+        self._loaded_at = time.monotonic()
+
+    async def snapshot(self) -> InstrumentSnapshot:
+        if self._snapshot is None or time.monotonic() - self._loaded_at > self.ttl:
+            await self.load()
+        return self._snapshot
+
+    async def exists(self, ticker: str) -> bool:
+        snapshot = await self.snapshot()
+        if ticker in snapshot.names:
+            return True
+        async with new_async_session() as session:
+            found = await session.scalar(
+                select(InstrumentModel.id).where(InstrumentModel.ticker == ticker)
+            )
+        if found is not None:
+            await self.load()
+        return found is not None
+
+    async def require(self, ticker: str):
+        if not await self.exists(ticker):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='Instrument not found'
+            )
+
+    def add(self, ticker: str, name: str):
+        if self._snapshot is not None:
+            self._set(InstrumentSnapshot.build({**self._snapshot.names, ticker: name}))
+
+    def remove(self, ticker: str):
+        if self._snapshot is not None:
+            names = dict(self._snapshot.names)
+            names.pop(ticker, None)
+            self._set(InstrumentSnapshot.build(names))
+
+    def invalidate(self, *_):
+        # Следующее обращение перечитает инструменты, не дожидаясь ttl
+        self._loaded_at = float('-inf')
+
+
+INSTRUMENT_CACHE_TTL = float(os.getenv('INSTRUMENT_CACHE_TTL', '5'))
+
+instrument_registry = InstrumentRegistry(ttl=INSTRUMENT_CACHE_TTL)
+
+# Добавление и удаление инструмента в одном воркере сбрасывает снимок в остальных
+INSTRUMENTS_CHANNEL = 'instruments'
+broadcast.listen(INSTRUMENTS_CHANNEL, instrument_registry.invalidate)
+broadcast.on_reconnect(instrument_registry.invalidate)
@@ -1,24 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from sqlalchemy import select, func
 
 from src.database import SessionDep
 from src.schemas import OkResponseSchema
 from src.users.dependencies import get_current_admin
 from src.instruments.models import InstrumentModel
 from src.instruments.schemas import InstrumentCreateSchema
+from src.instruments.registry import instrument_registry, INSTRUMENTS_CHANNEL
+from src.orders.engine import matching_engine
+from src.orders.contention import lock_tickers
 
 
 instrument_router = APIRouter()
 
+INSTRUMENTS_MAX_AGE = int(os.getenv('INSTRUMENTS_MAX_AGE', '5'))
+
 @instrument_router.get('/api/v1/public/instrument', response_model=list[InstrumentCreateSchema], tags=['public'])
 async def get_instruments_list(
-    session: SessionDep
+    if_none_match: Optional[str] = Header(None)
 ):
-    result = await session.execute(select(InstrumentModel))
-
-    instruments = result.scalars().all()
-
-    return instruments
+    snapshot = await instrument_registry.snapshot()
+    headers = {
+        'ETag': snapshot.etag,
+        'Cache-Control': f'public, max-age={INSTRUMENTS_MAX_AGE}'
+    }
+    if if_none_match is not None and snapshot.etag in if_none_match:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot.body, media_type='application/json', headers=headers)
 
 @instrument_router.post('/api/v1/admin/instrument', response_model=OkResponseSchema, tags=['admin'])
 async def create_instrument(
@@ -33,7 +44,10 @@ async def create_instrument(
     )
     
     session.add(new_instrument)
+    # Уведомление доставляется другим воркерам только после коммита
+    await session.execute(select(func.pg_notify(INSTRUMENTS_CHANNEL, user_data.ticker)))
     await session.commit()
+    instrument_registry.add(user_data.ticker, user_data.name)
 
     return {'success': True}
 
@@ -43,6 +57,7 @@ async def delete_instrument(
     ticker: str,
     admin_user = Depends(get_current_admin)
 ):
+    await lock_tickers(session, [ticker])
     instrument = await session.scalar(select(InstrumentModel).where(InstrumentModel.ticker == ticker))
 
     if not instrument:
@@ -52,6 +67,9 @@ async def delete_instrument(
         )
 
     await session.delete(instrument)
+    await session.execute(select(func.pg_notify(INSTRUMENTS_CHANNEL, ticker)))
     await session.commit()
+    instrument_registry.remove(ticker)
+    await matching_engine.discard(ticker)
 
     return {"success": True}
\ No newline at end of file
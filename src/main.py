@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 
 from src.users.router import auth_router
@@ -5,10 +8,53 @@ from src.instruments.router import instrument_router
 from src.orders.router import order_router
 from src.balance.router import balance_router
 from src.transactions.router import transaction_router
+from src.marketdata.router import marketdata_router
+from src.monitoring.router import monitoring_router
+from src.monitoring.middleware import MetricsMiddleware
+from src.orders.engine import matching_engine
+from src.orders.sharding import order_shards
+from src.transactions.partitions import run_maintenance
+from src.orders.history import run_history_mover
+from src.orders.journal import order_journal
+from src.orders.recovery import recover_journal
+from src.orders.bootstrap import run_bootstrap
+from src.instruments.registry import instrument_registry
+from src.monitoring.readiness import readiness
+from src.broadcast import broadcast
+from src.marketdata.feed import market_data
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await instrument_registry.load()
+    if order_journal.enabled:
+        # Транзакции, потерянные БД, применяются до загрузки стаканов
+        await recover_journal(order_journal.directory)
+        order_journal.open()
+    await order_shards.start()
+    # Обновления стаканов и сбросы кэшей рассылаются остальным воркерам через PostgreSQL
+    await broadcast.start()
+    market_data.join()
+    # Стаканы греются в фоне: воркер отвечает на health-пробы сразу, а заявки берёт после прогрева
+    readiness.begin()
+    tasks = [
+        asyncio.create_task(run_bootstrap(order_shards.owns)),
+        asyncio.create_task(run_maintenance()),
+        asyncio.create_task(run_history_mover()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await order_shards.stop()
+    await broadcast.stop()
+    await matching_engine.stop()
+    await order_journal.close()
 
 app = FastAPI(
     title='Trading API',
+    lifespan=lifespan,
     openapi_tags=[
         {
             'name': 'public',
@@ -28,8 +74,12 @@ app = FastAPI(
     ]
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth_router)
 app.include_router(instrument_router)
 app.include_router(order_router)
 app.include_router(balance_router)
-app.include_router(transaction_router)
\ No newline at end of file
+app.include_router(transaction_router)
+app.include_router(marketdata_router)
+app.include_router(monitoring_router)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import uuid
+from collections import defaultdict
+from typing import Optional
+
+from src.broadcast import Broadcast, broadcast, NOTIFY_PAYLOAD_LIMIT
+
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv('MARKET_DATA_QUEUE_SIZE', '256'))
+
+MARKET_DATA_CHANNEL = 'market_data'
+# Воркеры сообщают друг другу, на какие тикеры у них есть подписчики
+MARKET_DATA_INTEREST_CHANNEL = 'market_data_interest'
+
+# Маркер вместо накопившихся обновлений: подписчику нужно заново отправить снимок стакана
+RESYNC = object()
+
+
+class Subscriber:
+    __slots__ = ('queue', 'resyncs')
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.resyncs = 0
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Медленный клиент не тормозит матчинг: его очередь схлопывается в один снимок
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.resyncs += 1
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class MarketDataFeed:
+    """Подписчики на обновления стаканов в этом воркере.
+
+    Обновления из сведения в других воркерах приходят через broadcast строкой
+    "тикер\tseq\tpayload". Обновление, не влезающее в NOTIFY, передаётся без
+    payload, и подписчики получают RESYNC.
+
+    NOTIFY отправляется, только если на тикер подписан кто-то в другом воркере.
+    Интерес рассылается сообщениями "+воркер\tтикер" и "-воркер\tтикер";
+    "?воркер" просит остальных заново объявить свои тикеры. Интерес упавшего
+    воркера не снимается и стоит лишь лишних NOTIFY.
+    """
+
+    def __init__(self, relay: Optional[Broadcast] = None):
+        self._subscribers: dict[str, set[Subscriber]] = defaultdict(set)
+        self._remote: dict[str, set[str]] = defaultdict(set)
+        self.worker_id = uuid.uuid4().hex[:12]
+        self.relay = relay
+        if relay is not None:
+            relay.listen(MARKET_DATA_CHANNEL, self._receive)
+            relay.listen(MARKET_DATA_INTEREST_CHANNEL, self._receive_interest)
+            relay.on_reconnect(self.join)
+
+    @property
+    def relayed(self) -> bool:
+        return self.relay is not None and self.relay.enabled
+
+    def has_subscribers(self, ticker: str) -> bool:
+        return bool(self._subscribers.get(ticker))
+
+    def has_remote_subscribers(self, ticker: str) -> bool:
+        return self.relayed and bool(self._remote.get(ticker))
+
+    def wanted(self, ticker: str) -> bool:
+        # Обновление нужно собрать, если его ждут здесь или в других воркерах
+        return self.has_subscribers(ticker) or self.has_remote_subscribers(ticker)
+
+    def subscribe(self, ticker: str) -> Subscriber:
+        subscriber = Subscriber()
+        if not self._subscribers[ticker]:
+            self._announce('+', ticker)
+        self._subscribers[ticker].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, ticker: str, subscriber: Subscriber):
+        subscribers = self._subscribers.get(ticker)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[ticker]
+            self._announce('-', ticker)
+
+    def join(self):
+        """Запрашивает интерес остальных воркеров и объявляет свой: при старте и после переподключения."""
+        self._remote.clear()
+        self.resync_all()
+        if self.relayed:
+            self.relay.send(MARKET_DATA_INTEREST_CHANNEL, f'?{self.worker_id}')
+            for ticker in self._subscribers:
+                self._announce('+', ticker)
+
+    def publish(self, ticker: str, seq: int, payload: str):
+        self.deliver(ticker, seq, payload)
+        if self.has_remote_subscribers(ticker):
+            message = f'{ticker}\t{seq}\t{payload}'
+            if len(message.encode()) > NOTIFY_PAYLOAD_LIMIT:
+                message = f'{ticker}\t{seq}\t'
+            self.relay.send(MARKET_DATA_CHANNEL, message)
+
+    def deliver(self, ticker: str, seq: int, payload: str):
+        for subscriber in self._subscribers.get(ticker, ()):
+            subscriber.push((seq, payload))
+
+    def resync(self, ticker: str):
+        for subscriber in self._subscribers.get(ticker, ()):
+            subscriber.push(RESYNC)
+
+    def resync_all(self):
+        for ticker in list(self._subscribers):
+            self.resync(ticker)
+
+    def _announce(self, action: str, ticker: str):
+        if self.relayed:
+            self.relay.send(MARKET_DATA_INTEREST_CHANNEL, f'{action}{self.worker_id}\t{ticker}')
+
+    def _receive_interest(self, message: str):
+        action, body = message[0], message[1:]
+        if action == '?':
+            for ticker in list(self._remote):
+                self._forget(ticker, body)
+            for ticker in self._subscribers:
+                self._announce('+', ticker)
+            return
+        worker_id, ticker = body.split('\t', 1)
+        if action == '+':
+            self._remote[ticker].add(worker_id)
+            return
+        self._forget(ticker, worker_id)
+
+    def _forget(self, ticker: str, worker_id: str):
+        workers = self._remote.get(ticker)
+        if workers is not None:
+            workers.discard(worker_id)
+            if not workers:
+                del self._remote[ticker]
+
+    def _receive(self, message: str):
+        ticker, seq, payload = message.split('\t', 2)
+        if payload:
+            self.deliver(ticker, int(seq), payload)
+        else:
+            self.resync(ticker)
+
+
+market_data = MarketDataFeed(broadcast)
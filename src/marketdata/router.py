@@ -0,0 +1,68 @@
+import asyncio
+from contextlib import suppress
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+
+from src.orders.engine import matching_engine
+from src.marketdata.feed import market_data, Subscriber, RESYNC
+
+
+marketdata_router = APIRouter()
+
+async def send_snapshot(websocket: WebSocket, ticker: str, max_age: float = 0) -> int:
+    # Снимок сверяется с book_seq: стакан тикера мог меняться в другом воркере
+    engine = await matching_engine.loaded(ticker, max_age)
+    seq = engine.book.seq
+    snapshot = engine.snapshot().decode()
+    await websocket.send_text(f'{{"type":"snapshot","ticker":"{ticker}","book":{snapshot}}}')
+    return seq
+
+async def forward_updates(websocket: WebSocket, ticker: str, subscriber: Subscriber):
+    seq = await send_snapshot(websocket, ticker)
+    while True:
+        message = await subscriber.get()
+        if message is RESYNC:
+            seq = await send_snapshot(websocket, ticker)
+            continue
+        message_seq, payload = message
+        if message_seq <= seq:
+            continue
+        if message_seq > seq + 1:
+            # Пропущено обновление: клиент получает свежий снимок вместо дыры в seq
+            seq = await send_snapshot(websocket, ticker)
+            continue
+        seq = message_seq
+        await websocket.send_text(payload)
+
+async def wait_disconnect(websocket: WebSocket):
+    # Клиент ничего не присылает, но без чтения сокета отключение на тихом тикере не заметить
+    while (await websocket.receive())['type'] != 'websocket.disconnect':
+        pass
+
+@marketdata_router.websocket('/api/v1/public/ws/{ticker}')
+async def market_data_stream(
+    websocket: WebSocket,
+    ticker: str
+):
+    try:
+        await matching_engine.loaded(ticker)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason='Instrument not found')
+        return
+
+    await websocket.accept()
+    subscriber = market_data.subscribe(ticker)
+    tasks = [
+        asyncio.create_task(forward_updates(websocket, ticker, subscriber)),
+        asyncio.create_task(wait_disconnect(websocket)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            with suppress(WebSocketDisconnect):
+                task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        market_data.unsubscribe(ticker, subscriber)
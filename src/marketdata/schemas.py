@@ -0,0 +1,20 @@
+from typing import List, Literal
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from src.orders.schemas import OrderLevel
+
+
+class TradeSchema(BaseModel):
+    amount: int
+    price: int
+    timestamp: datetime
+
+class BookUpdateSchema(BaseModel):
+    type: Literal['update'] = 'update'
+    ticker: str
+    seq: int
+    trades: List[TradeSchema]
+    bid_levels: List[OrderLevel]
+    ask_levels: List[OrderLevel]
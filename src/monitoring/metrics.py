@@ -0,0 +1,81 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route template',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+ORDERS = Counter(
+    'orders_total',
+    'Orders processed by the matching engine',
+    ['type', 'outcome']
+)
+
+FILLS_PER_ORDER = Histogram(
+    'order_fills',
+    'Number of fills produced by one order',
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+)
+
+LOCK_WAIT = Histogram(
+    'matching_lock_wait_seconds',
+    'Time spent waiting for locks on the matching path',
+    ['lock'],
+    buckets=LATENCY_BUCKETS
+)
+
+DB_RETRIES = Counter(
+    'db_retries_total',
+    'Transactions retried after deadlock or serialization failure',
+    ['reason', 'result']
+)
+
+COMMIT_LATENCY = Histogram(
+    'db_commit_duration_seconds',
+    'Commit latency of matching transactions',
+    buckets=LATENCY_BUCKETS
+)
+
+JOURNAL_SYNC = Histogram(
+    'journal_fsync_duration_seconds',
+    'Duration of one group write and fsync of the order journal',
+    buckets=LATENCY_BUCKETS
+)
+
+JOURNAL_BATCH = Histogram(
+    'journal_batch_units',
+    'Matching transactions made durable by one journal fsync',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250, 500)
+)
+
+QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request',
+    'SQL statements executed per HTTP request',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+)
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    # Под gunicorn каждый воркер пишет значения в PROMETHEUS_MULTIPROC_DIR, при сборе они суммируются
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,42 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.monitoring import queries
+from src.monitoring.metrics import REQUEST_LATENCY, QUERIES_PER_REQUEST
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        with queries.count_queries() as stats:
+            async def send_wrapper(message: Message):
+                nonlocal status_code
+                if message['type'] == 'http.response.start':
+                    status_code = message['status']
+                    if queries.QUERY_DEBUG_HEADERS:
+                        # Для потоковых ответов здесь учтены только запросы до начала тела
+                        headers = MutableHeaders(scope=message)
+                        headers[queries.QUERY_COUNT_HEADER] = str(stats.count)
+                        headers[queries.QUERY_TIME_HEADER] = f'{stats.duration * 1000:.3f}'
+                await send(message)
+
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Метки по шаблону маршрута, а не по пути, чтобы число серий не росло с id и тикерами
+                route = scope.get('route')
+                path = route.path if route is not None else 'unmatched'
+                REQUEST_LATENCY.labels(scope['method'], path, str(status_code)).observe(time.perf_counter() - started)
+                QUERIES_PER_REQUEST.labels(path).observe(stats.count)
+                queries.check_budget(scope['method'], path, stats)
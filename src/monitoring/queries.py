@@ -0,0 +1,98 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from src.database import engine, env_int, env_bool
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_DEBUG_HEADERS = env_bool('QUERY_DEBUG_HEADERS')
+QUERY_BUDGET = env_int('QUERY_BUDGET', 25)
+QUERY_REPEAT_LIMIT = env_int('QUERY_REPEAT_LIMIT', 10)
+
+QUERY_COUNT_HEADER = 'X-DB-Queries'
+QUERY_TIME_HEADER = 'X-DB-Time'
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration', 'statements', 'parent')
+
+    def __init__(self, parent: Optional['QueryStats'] = None):
+        # Внешний счётчик (например, в тесте) тоже видит запросы вложенного HTTP запроса
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def most_repeated(self) -> tuple[str, int]:
+        if not self.statements:
+            return '', 0
+        return self.statements.most_common(1)[0]
+
+    def record(self, statement: str, elapsed: float):
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+    def problems(self) -> list[str]:
+        found = []
+        if self.count > QUERY_BUDGET:
+            found.append(f'{self.count} queries exceed budget of {QUERY_BUDGET}')
+        statement, repeats = self.most_repeated()
+        if repeats > QUERY_REPEAT_LIMIT:
+            # Один и тот же SQL в цикле — типичный N+1
+            found.append(f'statement repeated {repeats} times: {statement[:200]}')
+        return found
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+
+@event.listens_for(engine.sync_engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if query_stats.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, 'after_cursor_execute')
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    stats = query_stats.get()
+    if stats is None:
+        return
+    started = getattr(context, '_query_started', None)
+    stats.record(statement, time.perf_counter() - started if started is not None else 0.0)
+
+
+def check_budget(method: str, route: str, stats: QueryStats):
+    for problem in stats.problems():
+        logger.warning('%s %s: %s', method, route, problem)
+
+
+@contextmanager
+def count_queries():
+    """Считает запросы внутри блока, в том числе вложенные в запрос HTTP."""
+    stats = QueryStats(query_stats.get())
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    with count_queries() as stats:
+        yield stats
+    assert stats.count <= limit, (
+        f'Expected at most {limit} queries, got {stats.count}:\n'
+        + '\n'.join(f'{n} x {statement}' for statement, n in stats.statements.most_common())
+    )
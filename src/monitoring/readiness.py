@@ -0,0 +1,44 @@
+import asyncio
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+class Readiness:
+    """Готовность воркера принимать заявки.
+
+    На время прогрева состояния в памяти lifespan снимает готовность, а загрузчик
+    выставляет её вместе с отчётом. Приложение без lifespan (тесты) готово сразу.
+    """
+
+    def __init__(self):
+        self.ready = True
+        self.report: Optional[dict] = None
+        self._event: Optional[asyncio.Event] = None
+
+    def begin(self):
+        self.ready = False
+        self.report = None
+        self._event = asyncio.Event()
+
+    def set_ready(self, report: dict):
+        self.report = report
+        self.ready = True
+        if self._event is not None:
+            self._event.set()
+
+    async def wait(self):
+        if not self.ready:
+            await self._event.wait()
+
+
+readiness = Readiness()
+
+
+async def require_ready():
+    if not readiness.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Service is warming up',
+            headers={'Retry-After': '1'}
+        )
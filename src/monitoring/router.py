@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Response
+
+from src.database import pool_status
+from src.monitoring.metrics import metrics_payload
+from src.monitoring.readiness import readiness, require_ready
+from src.users.dependencies import get_current_admin
+
+
+monitoring_router = APIRouter()
+
+@monitoring_router.get('/api/v1/admin/database/pool', response_model=dict[str, float], tags=['admin'])
+async def get_pool_status(
+    admin_user = Depends(get_current_admin)
+):
+    return pool_status()
+
+@monitoring_router.get('/metrics', include_in_schema=False)
+async def get_metrics():
+    payload, content_type = metrics_payload()
+    return Response(content=payload, media_type=content_type)
+
+@monitoring_router.get('/health/live', include_in_schema=False)
+async def get_liveness():
+    return {'status': 'ok'}
+
+@monitoring_router.get('/health/ready', include_in_schema=False, dependencies=[Depends(require_ready)])
+async def get_readiness():
+    return {'status': 'ready', 'bootstrap': readiness.report}
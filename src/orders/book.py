@@ -0,0 +1,205 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import accumulate
+from typing import Iterator, NamedTuple, Optional
+
+from src.orders.models import DirectionEnum
+
+
+class RestingOrder:
+    __slots__ = ('id', 'user_id', 'direction', 'price', 'qty', 'filled', 'timestamp')
+
+    def __init__(
+        self,
+        id: str,
+        user_id: str,
+        direction: DirectionEnum,
+        price: int,
+        qty: int,
+        filled: int,
+        timestamp: datetime
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.direction = direction
+        self.price = price
+        self.qty = qty
+        self.filled = filled
+        self.timestamp = timestamp
+
+    @property
+    def remaining(self) -> int:
+        return self.qty - self.filled
+
+
+@dataclass(slots=True)
+class Fill:
+    maker: RestingOrder
+    qty: int
+    price: int
+
+
+class PriceLevel:
+    __slots__ = ('price', 'qty', 'orders')
+
+    def __init__(self, price: int):
+        self.price = price
+        self.qty = 0
+        # Словарь сохраняет порядок вставки (приоритет по времени) и снимает заявку за O(1)
+        self.orders: dict[str, RestingOrder] = {}
+
+
+class Quote(NamedTuple):
+    filled: int
+    amount: int
+    worst_price: Optional[int]
+
+
+class Depth:
+    """Накопленная глубина стороны: префиксные суммы объёма и стоимости по уровням в порядке исполнения."""
+    __slots__ = ('prices', 'cumulative_qty', 'cumulative_amount')
+
+    def __init__(self, levels: list[PriceLevel]):
+        self.prices = [level.price for level in levels]
+        self.cumulative_qty = list(accumulate(level.qty for level in levels))
+        self.cumulative_amount = list(accumulate(level.qty * level.price for level in levels))
+
+    def quote(self, qty: int) -> Quote:
+        if not self.prices:
+            return Quote(0, 0, None)
+        # Первый уровень, на котором накопленный объём покрывает qty
+        index = bisect_left(self.cumulative_qty, qty)
+        if index == len(self.prices):
+            return Quote(self.cumulative_qty[-1], self.cumulative_amount[-1], self.prices[-1])
+        before_qty = self.cumulative_qty[index - 1] if index else 0
+        before_amount = self.cumulative_amount[index - 1] if index else 0
+        return Quote(qty, before_amount + (qty - before_qty) * self.prices[index], self.prices[index])
+
+
+class BookSide:
+    def __init__(self, direction: DirectionEnum):
+        self.direction = direction
+        # Ключи отсортированы по приоритету исполнения: для покупок лучшая цена - наибольшая
+        self._sign = -1 if direction == DirectionEnum.BUY else 1
+        self._keys: list[int] = []
+        self._levels: dict[int, PriceLevel] = {}
+        self._depth: Optional[Depth] = None
+
+    def __iter__(self) -> Iterator[PriceLevel]:
+        for key in self._keys:
+            yield self._levels[key]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def best(self) -> Optional[PriceLevel]:
+        if not self._keys:
+            return None
+        return self._levels[self._keys[0]]
+
+    def level(self, price: int) -> Optional[PriceLevel]:
+        return self._levels.get(self._sign * price)
+
+    def depth(self) -> Depth:
+        # Пересчитывается лениво, один раз после изменения стороны
+        if self._depth is None:
+            self._depth = Depth(list(self))
+        return self._depth
+
+    def add(self, order: RestingOrder):
+        self._depth = None
+        key = self._sign * order.price
+        level = self._levels.get(key)
+        if level is None:
+            level = PriceLevel(order.price)
+            self._levels[key] = level
+            self._keys.insert(bisect_left(self._keys, key), key)
+        level.orders[str(order.id)] = order
+        level.qty += order.remaining
+
+    def remove(self, order: RestingOrder):
+        self._depth = None
+        level = self._levels[self._sign * order.price]
+        del level.orders[str(order.id)]
+        level.qty -= order.remaining
+        if not level.orders:
+            self._drop(level)
+
+    def _drop(self, level: PriceLevel):
+        key = self._sign * level.price
+        del self._levels[key]
+        del self._keys[bisect_left(self._keys, key)]
+
+    def crosses(self, level_price: int, limit_price: Optional[int]) -> bool:
+        if limit_price is None:
+            return True
+        return self._sign * level_price <= self._sign * limit_price
+
+
+class OrderBook:
+    def __init__(self, ticker: str, seq: int = -1):
+        self.ticker = ticker
+        self.seq = seq
+        self.bids = BookSide(DirectionEnum.BUY)
+        self.asks = BookSide(DirectionEnum.SELL)
+        self._orders: dict[str, RestingOrder] = {}
+
+    def __contains__(self, order_id: str) -> bool:
+        return str(order_id) in self._orders
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def side(self, direction: DirectionEnum) -> BookSide:
+        return self.bids if direction == DirectionEnum.BUY else self.asks
+
+    def opposite(self, direction: DirectionEnum) -> BookSide:
+        return self.asks if direction == DirectionEnum.BUY else self.bids
+
+    def get(self, order_id: str) -> Optional[RestingOrder]:
+        return self._orders.get(str(order_id))
+
+    def add(self, order: RestingOrder):
+        self._orders[str(order.id)] = order
+        self.side(order.direction).add(order)
+
+    def remove(self, order_id: str) -> Optional[RestingOrder]:
+        order = self._orders.pop(str(order_id), None)
+        if order is not None:
+            self.side(order.direction).remove(order)
+        return order
+
+    def quote(self, direction: DirectionEnum, qty: int) -> Quote:
+        """Сколько исполнит рыночная заявка на qty и по какой стоимости, без изменения стакана."""
+        return self.opposite(direction).depth().quote(qty)
+
+    def match(self, direction: DirectionEnum, qty: int, limit_price: Optional[int] = None) -> list[Fill]:
+        # Только расчёт сделок: стакан не меняется, пока результат не записан в БД
+        side = self.opposite(direction)
+        fills = []
+        remaining = qty
+        for level in side:
+            if remaining <= 0 or not side.crosses(level.price, limit_price):
+                break
+            for maker in level.orders.values():
+                if remaining <= 0:
+                    break
+                match_qty = min(remaining, maker.remaining)
+                fills.append(Fill(maker=maker, qty=match_qty, price=level.price))
+                remaining -= match_qty
+        return fills
+
+    def apply(self, fills: list[Fill]):
+        for fill in fills:
+            maker = fill.maker
+            side = self.side(maker.direction)
+            level = side.level(maker.price)
+            maker.filled += fill.qty
+            level.qty -= fill.qty
+            side._depth = None
+            if maker.remaining == 0:
+                del level.orders[str(maker.id)]
+                del self._orders[str(maker.id)]
+                if not level.orders:
+                    side._drop(level)
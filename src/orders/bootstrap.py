@@ -0,0 +1,111 @@
+import logging
+import os
+import resource
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import new_async_session, env_int
+from src.instruments.models import InstrumentModel
+from src.orders.book import OrderBook, RestingOrder
+from src.orders.engine import matching_engine
+from src.orders.models import DirectionEnum
+from src.monitoring.readiness import readiness
+
+
+logger = logging.getLogger(__name__)
+
+BOOTSTRAP_PREFETCH = env_int('BOOTSTRAP_PREFETCH', 10000)
+
+# Порядок совпадает с частичным индексом ix_orders_open_book, поэтому весь поток
+# идёт одним индексным проходом, а заявки уровня добавляются в порядке времени
+OPEN_ORDERS_SQL = (
+    "SELECT ticker, id, user_id, direction, price, qty, filled FROM orders "
+    "WHERE status IN ('NEW', 'PARTIALLY_EXECUTED') AND price IS NOT NULL "
+    "ORDER BY ticker, direction, price, timestamp, id"
+)
+
+DIRECTIONS = {direction.name: direction for direction in DirectionEnum}
+
+
+@dataclass(slots=True)
+class BootstrapReport:
+    books: int
+    orders: int
+    seconds: float
+    rss_mb: float
+    rss_delta_mb: float
+
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Вне Linux доступен только пик, в килобайтах
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def stream_books(
+    session: AsyncSession,
+    owns: Callable[[str], bool] = lambda ticker: True,
+    prefetch: int = BOOTSTRAP_PREFETCH
+) -> dict[str, OrderBook]:
+    """Читает все открытые лимитные заявки одним серверным курсором asyncpg.
+
+    book_seq и заявки читаются в одном снимке REPEATABLE READ, так что стаканы
+    согласованы со своими seq. Строки не превращаются ни в ORM-объекты, ни в Row.
+    """
+    await session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+    seqs = (await session.execute(select(InstrumentModel.ticker, InstrumentModel.book_seq))).all()
+    books = {ticker: OrderBook(ticker, seq) for ticker, seq in seqs if owns(ticker)}
+
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    book = None
+    async for ticker, order_id, user_id, direction, price, qty, filled in raw.driver_connection.cursor(
+        OPEN_ORDERS_SQL, prefetch=prefetch
+    ):
+        if book is None or book.ticker != ticker:
+            book = books.get(ticker)
+            if book is None:
+                continue
+        # Время заявки задаёт только порядок внутри уровня, и он уже учтён сортировкой
+        book.add(RestingOrder(str(order_id), user_id, DIRECTIONS[direction], price, qty, filled, None))
+    return books
+
+
+async def warm_up(owns: Callable[[str], bool] = lambda ticker: True) -> BootstrapReport:
+    started = time.perf_counter()
+    rss_before = rss_bytes()
+    async with new_async_session() as session:
+        books = await stream_books(session, owns)
+    for book in books.values():
+        await matching_engine.install(book)
+
+    rss_after = rss_bytes()
+    report = BootstrapReport(
+        books=len(books),
+        orders=sum(len(book) for book in books.values()),
+        seconds=round(time.perf_counter() - started, 3),
+        rss_mb=round(rss_after / 2 ** 20, 1),
+        rss_delta_mb=round((rss_after - rss_before) / 2 ** 20, 1)
+    )
+    logger.info(
+        'Loaded %d resting orders into %d books in %.3f s, RSS %.1f MB (+%.1f MB)',
+        report.orders, report.books, report.seconds, report.rss_mb, report.rss_delta_mb
+    )
+    return report
+
+async def run_bootstrap(owns: Optional[Callable[[str], bool]] = None):
+    try:
+        report = await warm_up(owns or (lambda ticker: True))
+    except Exception:
+        # Стаканы всё равно подгрузятся по одному при первой команде по тикеру
+        logger.exception('Order book bootstrap failed, books will load on demand')
+        readiness.set_ready({'bootstrap': 'failed'})
+        return
+    readiness.set_ready(asdict(report))
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.monitoring.metrics import LOCK_WAIT, DB_RETRIES
+
+
+DB_RETRY_ATTEMPTS = int(os.getenv('DB_RETRY_ATTEMPTS', '4'))
+DB_RETRY_BASE_DELAY = float(os.getenv('DB_RETRY_BASE_DELAY', '0.005'))
+DB_RETRY_MAX_DELAY = float(os.getenv('DB_RETRY_MAX_DELAY', '0.2'))
+
+RETRYABLE_SQLSTATES = {
+    '40P01': 'deadlock',
+    '40001': 'serialization',
+    '55P03': 'lock_timeout',
+}
+FOREIGN_KEY_VIOLATION = '23503'
+
+T = TypeVar('T')
+
+
+def stable_hash(key: str) -> int:
+    # hash() у str зависит от PYTHONHASHSEED и различается между процессами
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+def ticker_lock_key(ticker: str) -> int:
+    # pg_advisory_xact_lock принимает знаковый bigint
+    return stable_hash(f'book:{ticker}') - 2 ** 63
+
+
+async def lock_tickers(session: AsyncSession, tickers):
+    """Берёт транзакционные advisory-блокировки тикеров в порядке тикеров."""
+    for ticker in sorted(tickers):
+        started = time.perf_counter()
+        await session.execute(select(func.pg_advisory_xact_lock(ticker_lock_key(ticker))))
+        LOCK_WAIT.labels('ticker').observe(time.perf_counter() - started)
+
+
+def error_sqlstate(error: DBAPIError) -> Optional[str]:
+    return getattr(error.orig, 'sqlstate', None) or getattr(error.orig, 'pgcode', None)
+
+def retry_reason(error: DBAPIError) -> Optional[str]:
+    return RETRYABLE_SQLSTATES.get(error_sqlstate(error))
+
+def user_vanished(error: DBAPIError) -> bool:
+    # Пользователя удалили, пока его ключ ещё жил в кэше воркера: вставка его заявки
+    # или баланса нарушает внешний ключ на users
+    if error_sqlstate(error) != FOREIGN_KEY_VIOLATION:
+        return False
+    constraint = getattr(error.orig.__cause__, 'constraint_name', None) or str(error.orig)
+    return 'user_id_fkey' in constraint
+
+def backoff(attempt: int) -> float:
+    # Full jitter: одновременно откатившиеся транзакции не повторяются в такт
+    return random.uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def with_retry(operation: Callable[[], Awaitable[T]]) -> T:
+    for attempt in range(1, DB_RETRY_ATTEMPTS + 1):
+        try:
+            return await operation()
+        except DBAPIError as e:
+            if user_vanished(e):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail='Invalid token'
+                ) from e
+            reason = retry_reason(e)
+            if reason is None:
+                raise
+            if attempt == DB_RETRY_ATTEMPTS:
+                DB_RETRIES.labels(reason, 'exhausted').inc()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail='Concurrent update conflict, retry the request'
+                ) from e
+            DB_RETRIES.labels(reason, 'retried').inc()
+            await asyncio.sleep(backoff(attempt))
@@ -0,0 +1,819 @@
+import asyncio
+import logging
+import os
+import time
+from contextvars import copy_context
+from contextlib import asynccontextmanager, AsyncExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, values, column, case, cast, tuple_, Integer
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import new_async_session
+from src.orders.book import OrderBook, RestingOrder, Fill
+from src.orders.models import OrderModel, OrderHistoryModel, StatusEnum, DirectionEnum
+from src.orders.schemas import OrderBookListSchema, OrderLevel
+from src.instruments.models import InstrumentModel
+from src.instruments.registry import instrument_registry
+from src.transactions.bulk import TradeRow, write_trades
+from src.balance.settlement import Settlement, available_balances
+from src.marketdata.feed import market_data
+from src.marketdata.schemas import BookUpdateSchema, TradeSchema
+from src.monitoring.metrics import ORDERS, FILLS_PER_ORDER, COMMIT_LATENCY
+from src.orders.contention import lock_tickers, with_retry
+from src.orders.journal import order_journal, JournalUnit, OrderAccepted, OrderFilled, OrderCancelled
+
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = (StatusEnum.NEW, StatusEnum.PARTIALLY_EXECUTED)
+
+BOOK_PAGE_SIZE = int(os.getenv('ORDER_BOOK_PAGE_SIZE', '500'))
+# Как долго чтение стакана без сверки с book_seq считается свежим
+BOOK_FRESHNESS = float(os.getenv('ORDER_BOOK_FRESHNESS', '0.1'))
+
+
+class StaleBookError(Exception):
+    pass
+
+
+@dataclass(slots=True)
+class OrderResult:
+    order_id: Optional[str]
+    filled: int
+    status: Optional[StatusEnum]
+    # Причина отказа заявки пакета; отклонённая заявка не записывается
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Execution:
+    order_id: str
+    timestamp: datetime
+    user_id: UUID
+    direction: DirectionEnum
+    qty: int
+    price: Optional[int]
+    fills: list[Fill] = field(default_factory=list)
+    trades: list[TradeRow] = field(default_factory=list)
+    touched: set = field(default_factory=set)
+    result: Optional[OrderResult] = None
+
+
+def resting_order_columns():
+    return (
+        OrderModel.id,
+        OrderModel.user_id,
+        OrderModel.direction,
+        OrderModel.price,
+        OrderModel.qty,
+        OrderModel.filled,
+        OrderModel.timestamp
+    )
+
+
+def resting_order_from_row(row) -> RestingOrder:
+    return RestingOrder(
+        id=str(row.id),
+        user_id=row.user_id,
+        direction=row.direction,
+        price=row.price,
+        qty=row.qty,
+        filled=row.filled,
+        timestamp=row.timestamp
+    )
+
+
+async def fetch_resting_orders(
+    session: AsyncSession,
+    ticker: str,
+    direction: DirectionEnum,
+    page_size: int = BOOK_PAGE_SIZE
+):
+    # Страницы по ключу (price, timestamp, id) идут по частичному индексу ix_orders_open_book
+    query = (
+        select(*resting_order_columns())
+        .where(OrderModel.ticker == ticker)
+        .where(OrderModel.direction == direction)
+        .where(OrderModel.status.in_(OPEN_STATUSES))
+        .where(OrderModel.price != None)
+        .order_by(OrderModel.price.asc(), OrderModel.timestamp.asc(), OrderModel.id.asc())
+        .limit(page_size)
+    )
+    page = query
+    while True:
+        rows = (await session.execute(page)).all()
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+        page = query.where(
+            tuple_(OrderModel.price, OrderModel.timestamp, OrderModel.id)
+            > (last.price, last.timestamp, last.id)
+        )
+
+
+async def load_book(session: AsyncSession, ticker: str, seq: int) -> OrderBook:
+    book = OrderBook(ticker, seq)
+    for direction in DirectionEnum:
+        async for row in fetch_resting_orders(session, ticker, direction):
+            book.add(resting_order_from_row(row))
+    return book
+
+
+async def commit_transaction(session: AsyncSession):
+    await session.flush()
+    started = time.perf_counter()
+    await session.commit()
+    COMMIT_LATENCY.observe(time.perf_counter() - started)
+
+
+async def commit_journaled(session: AsyncSession, units: list[JournalUnit]):
+    """Фиксирует транзакцию сведения, сначала записав её события в журнал.
+
+    Кадры пишутся под блокировками тикеров, поэтому в журнале они идут в порядке
+    book_seq. Коммит остаётся синхронным, и журнал добавляет к заявке fsync, а не
+    сокращает её задержку: он нужен, чтобы транзакцию, записанную в журнал до
+    падения процесса, можно было применить при старте. На любом пути, где
+    клиент получает ошибку после записи кадров, в журнал пишется откат.
+    """
+    if not order_journal.enabled or not units:
+        await commit_transaction(session)
+        return
+    await session.flush()
+    try:
+        # Кадры могли попасть в файл, даже если fsync упал
+        await order_journal.append(units)
+        await commit_transaction(session)
+    except BaseException:
+        await order_journal.abort(units)
+        raise
+
+
+def record_order(price: Optional[int], outcome: str):
+    ORDERS.labels('limit' if price is not None else 'market', outcome).inc()
+
+
+class TickerEngine:
+    """Стакан одного тикера и задача, которая последовательно исполняет команды над ним.
+
+    Стакан - кэш открытых заявок из таблицы orders. Перед каждой командой
+    берётся транзакционная advisory-блокировка тикера и сверяется book_seq:
+    если стакан менял другой процесс, он перечитывается из БД.
+    """
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.book = OrderBook(ticker)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[bytes] = None
+        self._snapshot_seq: Optional[int] = None
+        self._checked_at = float('-inf')
+        # Пакет меняет стакан до коммита: пока он не завершён, стакан не отдаётся читателям
+        self._dirty = False
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(), name=f'matching:{self.ticker}')
+
+    async def submit(self, handler, *args):
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((handler, args, future, copy_context()))
+        return await future
+
+    async def _run(self):
+        while True:
+            handler, args, future, context = await self._queue.get()
+            if future.cancelled():
+                continue
+            try:
+                # Команда выполняется в контексте запроса, чтобы метрики запроса учитывали её SQL
+                result = await asyncio.get_running_loop().create_task(handler(*args), context=context)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    async def stop(self):
+        if self._task is None or self._task.done():
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # Команды, оставшиеся в очереди, уже не выполнятся
+        while not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail='Instrument not found'
+                ))
+
+    def fresh(self, max_age: float) -> bool:
+        return not self._dirty and self.book.seq >= 0 and time.monotonic() - self._checked_at <= max_age
+
+    def invalidate(self):
+        # Стакан разошёлся с БД: следующая команда перечитает его, а снимок пересоберётся
+        self.book.seq = -1
+        self._snapshot_seq = None
+        self._dirty = False
+
+    def snapshot(self) -> bytes:
+        # Уровни стакана поддерживаются инкрементально, JSON собирается один раз на seq
+        if self._snapshot_seq != self.book.seq:
+            self._snapshot = OrderBookListSchema(
+                bid_levels=[OrderLevel(price=level.price, qty=level.qty) for level in self.book.bids],
+                ask_levels=[OrderLevel(price=level.price, qty=level.qty) for level in self.book.asks],
+                seq=self.book.seq
+            ).model_dump_json().encode()
+            self._snapshot_seq = self.book.seq
+        return self._snapshot
+
+    def _publish(self, seq: int, trades: list[TradeSchema], touched: set):
+        if not market_data.wanted(self.ticker):
+            return
+        bid_levels = []
+        ask_levels = []
+        for direction, price in sorted(touched, key=lambda item: item[1]):
+            level = self.book.side(direction).level(price)
+            levels = bid_levels if direction == DirectionEnum.BUY else ask_levels
+            levels.append(OrderLevel(price=price, qty=level.qty if level else 0))
+        update_message = BookUpdateSchema(
+            ticker=self.ticker,
+            seq=seq,
+            trades=trades,
+            bid_levels=bid_levels,
+            ask_levels=ask_levels
+        )
+        market_data.publish(self.ticker, seq, update_message.model_dump_json())
+
+    async def refresh(self, max_age: float = 0):
+        # Запросы, стоявшие в очереди за только что выполненной сверкой, её не повторяют
+        if self.fresh(max_age):
+            return
+        checked_at = time.monotonic()
+        async with new_async_session() as session:
+            seq = await session.scalar(
+                select(InstrumentModel.book_seq)
+                .where(InstrumentModel.ticker == self.ticker)
+            )
+            if seq is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail='Instrument not found'
+                )
+            if seq != self.book.seq:
+                await self._reload(session, seq)
+        self._checked_at = checked_at
+
+    async def sync(self, session: AsyncSession):
+        # Заявки тикера сериализуются advisory-блокировкой до конца транзакции,
+        # book_seq читается уже под ней
+        await lock_tickers(session, [self.ticker])
+        seq = await session.scalar(
+            select(InstrumentModel.book_seq)
+            .where(InstrumentModel.ticker == self.ticker)
+        )
+        if seq is None:
+            self.book = OrderBook(self.ticker)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail='Instrument not found'
+            )
+        if seq != self.book.seq:
+            await self._reload(session, seq)
+        self._checked_at = time.monotonic()
+
+    async def install(self, book: OrderBook):
+        # Загруженный при старте стакан не заменяет более свежий, уже прочитанный командой
+        if book.seq > self.book.seq:
+            self.book = book
+
+    async def _reload(self, session: AsyncSession, seq: int):
+        self.book = await load_book(session, self.ticker, seq)
+        self._snapshot_seq = None
+
+    async def bump_seq(self, session: AsyncSession) -> int:
+        return await session.scalar(
+            update(InstrumentModel)
+            .where(InstrumentModel.ticker == self.ticker)
+            .values(book_seq=InstrumentModel.book_seq + 1)
+            .returning(InstrumentModel.book_seq)
+        )
+
+    async def write_makers(self, session: AsyncSession, fills: list[Fill]):
+        if not fills:
+            return
+        fills_values = values(
+            column('id', PG_UUID),
+            column('qty', Integer),
+            column('prev_filled', Integer),
+            name='fills'
+        ).data([(fill.maker.id, fill.qty, fill.maker.filled) for fill in fills])
+
+        new_filled = OrderModel.filled + fills_values.c.qty
+        status_type = OrderModel.__table__.c.status.type
+        updated = await session.scalars(
+            update(OrderModel)
+            .where(OrderModel.id == fills_values.c.id)
+            .where(OrderModel.filled == fills_values.c.prev_filled)
+            .where(OrderModel.status.in_(OPEN_STATUSES))
+            .values(
+                filled=new_filled,
+                status=case(
+                    (new_filled == OrderModel.qty, cast(StatusEnum.EXECUTED, status_type)),
+                    else_=cast(StatusEnum.PARTIALLY_EXECUTED, status_type)
+                )
+            )
+            .returning(OrderModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        if len(updated.all()) != len(fills):
+            raise StaleBookError(self.ticker)
+
+    @asynccontextmanager
+    async def exclusive(self):
+        # Занимает задачу тикера: пока блок открыт, другие команды по тикеру ждут в очереди
+        acquired = asyncio.get_running_loop().create_future()
+        released = asyncio.Event()
+
+        async def hold():
+            if not acquired.done():
+                acquired.set_result(None)
+            await released.wait()
+
+        holder = asyncio.ensure_future(self.submit(hold))
+        try:
+            await acquired
+            yield self
+        finally:
+            released.set()
+            await holder
+
+    def execute(
+        self,
+        settlement: Settlement,
+        user_id: UUID,
+        direction: DirectionEnum,
+        qty: int,
+        price: Optional[int]
+    ) -> Execution:
+        execution = Execution(
+            order_id=str(uuid4()),
+            timestamp=datetime.now(timezone.utc),
+            user_id=user_id,
+            direction=direction,
+            qty=qty,
+            price=price
+        )
+
+        execution.fills = self.book.match(direction, qty, price)
+        total_filled = sum(fill.qty for fill in execution.fills)
+        if price is None and total_filled < qty:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient liquidity for market order"
+            )
+
+        for fill in execution.fills:
+            if direction == DirectionEnum.BUY:
+                buyer, seller = user_id, fill.maker.user_id
+            else:
+                buyer, seller = fill.maker.user_id, user_id
+
+            settlement.transfer(buyer, seller, self.ticker, fill.qty, fill.price)
+            # Мейкер платит из резерва, поставленного при выставлении заявки
+            settlement.release(fill.maker.user_id, fill.maker.direction, self.ticker, fill.qty, fill.price)
+            execution.trades.append(TradeRow(
+                uuid4(), buyer, seller, self.ticker, fill.qty, fill.price, execution.timestamp
+            ))
+
+        if total_filled == qty:
+            order_status = StatusEnum.EXECUTED
+        elif total_filled > 0 and price is not None:
+            order_status = StatusEnum.PARTIALLY_EXECUTED
+        else:
+            order_status = StatusEnum.NEW
+        execution.result = OrderResult(order_id=execution.order_id, filled=total_filled, status=order_status)
+        if order_status != StatusEnum.EXECUTED and price is not None:
+            settlement.reserve(user_id, direction, self.ticker, qty - total_filled, price)
+        return execution
+
+    def record(self, session: AsyncSession, execution: Execution):
+        result = execution.result
+        if execution.price is None and result.status != StatusEnum.EXECUTED:
+            return
+        # Целиком исполненная заявка сразу пишется в историю и не попадает в orders
+        model = OrderHistoryModel if result.status == StatusEnum.EXECUTED else OrderModel
+        session.add(model(
+            id=execution.order_id,
+            user_id=execution.user_id,
+            ticker=self.ticker,
+            direction=execution.direction,
+            qty=execution.qty,
+            price=execution.price,
+            filled=result.filled,
+            status=result.status,
+            timestamp=execution.timestamp
+        ))
+
+    def journal_unit(self, seq: int, executions: list[Execution]) -> JournalUnit:
+        events = []
+        for execution in executions:
+            result = execution.result
+            events.append(OrderAccepted(
+                execution.order_id, execution.user_id, execution.direction, execution.qty,
+                execution.price, result.filled, result.status, execution.timestamp
+            ))
+            for fill, trade in zip(execution.fills, execution.trades):
+                events.append(OrderFilled(
+                    trade.id, fill.maker.id, trade.buyer_id, trade.seller_id,
+                    fill.maker.direction, fill.qty, fill.price, execution.timestamp
+                ))
+        return JournalUnit(self.ticker, seq, events)
+
+    def apply(self, execution: Execution):
+        result = execution.result
+        FILLS_PER_ORDER.observe(len(execution.fills))
+        execution.touched = {(fill.maker.direction, fill.price) for fill in execution.fills}
+        self.book.apply(execution.fills)
+        if execution.price is not None and result.filled < execution.qty:
+            execution.touched.add((execution.direction, execution.price))
+            self.book.add(RestingOrder(
+                id=execution.order_id,
+                user_id=execution.user_id,
+                direction=execution.direction,
+                price=execution.price,
+                qty=execution.qty,
+                filled=result.filled,
+                timestamp=execution.timestamp
+            ))
+
+    def commit(self, seq: int, executions: list[Execution]):
+        self.book.seq = seq
+        self._dirty = False
+        if not market_data.wanted(self.ticker):
+            return
+        trades = [
+            TradeSchema(amount=fill.qty, price=fill.price, timestamp=execution.timestamp)
+            for execution in executions
+            for fill in execution.fills
+        ]
+        touched = set().union(*(execution.touched for execution in executions))
+        self._publish(seq, trades, touched)
+
+    async def place_order(
+        self,
+        user_id: UUID,
+        direction: DirectionEnum,
+        qty: int,
+        price: Optional[int]
+    ) -> OrderResult:
+        try:
+            if price is None and not await self.can_fill(direction, qty):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Insufficient liquidity for market order"
+                )
+            for _ in range(2):
+                try:
+                    result = await with_retry(lambda: self._place_order(user_id, direction, qty, price))
+                    record_order(price, result.status.value.lower())
+                    return result
+                except StaleBookError:
+                    logger.warning('Order book for %s is stale, reloading', self.ticker)
+                    self.invalidate()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail='Order book changed concurrently, retry the order'
+            )
+        except HTTPException:
+            record_order(price, 'rejected')
+            raise
+        except Exception:
+            record_order(price, 'error')
+            raise
+
+    async def can_fill(self, direction: DirectionEnum, qty: int) -> bool:
+        """Проверка ликвидности рыночной заявки по накопленной глубине, без блокировок.
+
+        Отказ выносится, только если стакан не отстал от БД; иначе заявка
+        идёт обычным путём и проверяется под блокировкой тикера.
+        """
+        if self.book.seq >= 0 and self.book.quote(direction, qty).filled == qty:
+            return True
+        async with new_async_session() as session:
+            seq = await session.scalar(
+                select(InstrumentModel.book_seq)
+                .where(InstrumentModel.ticker == self.ticker)
+            )
+        return seq != self.book.seq
+
+    async def _place_order(
+        self,
+        user_id: UUID,
+        direction: DirectionEnum,
+        qty: int,
+        price: Optional[int]
+    ) -> OrderResult:
+        async with new_async_session() as session:
+            await self.sync(session)
+
+            settlement = Settlement()
+            execution = self.execute(settlement, user_id, direction, qty, price)
+            self.record(session, execution)
+            await write_trades(session, execution.trades)
+            await settlement.apply(session)
+            await self.write_makers(session, execution.fills)
+            seq = await self.bump_seq(session)
+            await commit_journaled(session, [self.journal_unit(seq, [execution])])
+
+        # Стакан меняется только после успешного коммита
+        self.apply(execution)
+        self.commit(seq, [execution])
+        return execution.result
+
+    async def cancel_order(self, user_id: UUID, order_id: UUID):
+        await with_retry(lambda: self._cancel_order(user_id, order_id))
+
+    async def _cancel_order(self, user_id: UUID, order_id: UUID):
+        async with new_async_session() as session:
+            await self.sync(session)
+
+            cancelled = (await session.execute(
+                update(OrderModel)
+                .where(OrderModel.id == order_id)
+                .where(OrderModel.user_id == user_id)
+                .where(OrderModel.status.in_(OPEN_STATUSES))
+                .values(status=StatusEnum.CANCELLED)
+                .returning(OrderModel.direction, OrderModel.qty, OrderModel.filled, OrderModel.price)
+            )).first()
+            if cancelled is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail='Order is not active'
+                )
+            settlement = Settlement()
+            direction, qty, filled, price = cancelled
+            settlement.release(user_id, direction, self.ticker, qty - filled, price)
+            await settlement.apply(session)
+            seq = await self.bump_seq(session)
+            await commit_journaled(session, [JournalUnit(
+                self.ticker, seq, [OrderCancelled(order_id, user_id, direction, qty - filled, price)]
+            )])
+
+        self.remove_orders(seq, [order_id])
+
+    def remove_orders(self, seq: int, order_ids: list):
+        touched = set()
+        for order_id in order_ids:
+            order = self.book.remove(order_id)
+            if order is not None:
+                touched.add((order.direction, order.price))
+        self.book.seq = seq
+        self._publish(seq, [], touched)
+
+
+class MatchingEngine:
+    def __init__(self):
+        self._tickers: dict[str, TickerEngine] = {}
+
+    def get(self, ticker: str) -> TickerEngine:
+        engine = self._tickers.get(ticker)
+        if engine is None:
+            engine = TickerEngine(ticker)
+            self._tickers[ticker] = engine
+        return engine
+
+    async def discard(self, ticker: str):
+        engine = self._tickers.pop(ticker, None)
+        if engine is not None:
+            engine.book = OrderBook(ticker)
+            await engine.stop()
+
+    async def place_order(
+        self,
+        ticker: str,
+        user_id: UUID,
+        direction: DirectionEnum,
+        qty: int,
+        price: Optional[int]
+    ) -> OrderResult:
+        engine = self.get(ticker)
+        return await engine.submit(engine.place_order, user_id, direction, qty, price)
+
+    async def place_orders(self, user_id: UUID, orders: list[tuple]) -> list[OrderResult]:
+        # Задачи тикеров занимаются в порядке тикеров, чтобы два пакета не ждали друг друга
+        tickers = sorted({order[0] for order in orders})
+        async with AsyncExitStack() as stack:
+            engines = {
+                ticker: await stack.enter_async_context(self.get(ticker).exclusive())
+                for ticker in tickers
+            }
+            try:
+                for _ in range(2):
+                    try:
+                        results = await with_retry(lambda: self._place_orders(user_id, orders, engines))
+                        for (_, _, _, price), result in zip(orders, results):
+                            record_order(price, 'rejected' if result.error else result.status.value.lower())
+                        return results
+                    except StaleBookError as e:
+                        logger.warning('Order book for %s is stale, reloading', e)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail='Order book changed concurrently, retry the orders'
+                )
+            except Exception as e:
+                outcome = 'rejected' if isinstance(e, HTTPException) else 'error'
+                for _, _, _, price in orders:
+                    record_order(price, outcome)
+                raise
+
+    async def _place_orders(
+        self,
+        user_id: UUID,
+        orders: list[tuple],
+        engines: dict[str, TickerEngine]
+    ) -> list[OrderResult]:
+        executions = {ticker: [] for ticker in engines}
+        results = []
+        try:
+            async with new_async_session() as session:
+                for engine in engines.values():
+                    await engine.sync(session)
+
+                # Заявки пакета проверяются по одной: нехватка ликвидности или баланса
+                # отклоняет только свою заявку. Остатки пользователя читаются один раз
+                # и уменьшаются по мере принятия заявок, итоговая проверка остаётся в apply
+                available = await available_balances(session, user_id)
+                # Заявки пакета видят друг друга, поэтому стакан меняется сразу,
+                # а при откате транзакции перечитывается из БД
+                settlement = Settlement()
+                for ticker, direction, qty, price in orders:
+                    engine = engines[ticker]
+                    order_settlement = Settlement()
+                    try:
+                        execution = engine.execute(order_settlement, user_id, direction, qty, price)
+                        order_settlement.require(available)
+                    except HTTPException as e:
+                        results.append(OrderResult(order_id=None, filled=0, status=None, error=e.detail))
+                        continue
+                    engine.record(session, execution)
+                    await engine.write_makers(session, execution.fills)
+                    engine._dirty = True
+                    engine.apply(execution)
+                    settlement.merge(order_settlement)
+                    executions[ticker].append(execution)
+                    results.append(execution.result)
+                if not any(executions.values()):
+                    return results
+                await write_trades(session, [
+                    trade for ticker_executions in executions.values()
+                    for execution in ticker_executions
+                    for trade in execution.trades
+                ])
+                await settlement.apply(session)
+
+                seqs = {
+                    ticker: await engine.bump_seq(session)
+                    for ticker, engine in engines.items() if executions[ticker]
+                }
+                await commit_journaled(session, [
+                    engines[ticker].journal_unit(seq, executions[ticker]) for ticker, seq in seqs.items()
+                ])
+        except BaseException:
+            for engine in engines.values():
+                engine.invalidate()
+            raise
+
+        for ticker, seq in seqs.items():
+            engines[ticker].commit(seq, executions[ticker])
+        return results
+
+    async def cancel_order(self, ticker: str, user_id: UUID, order_id: UUID):
+        engine = self.get(ticker)
+        await engine.submit(engine.cancel_order, user_id, order_id)
+
+    async def cancel_orders(
+        self,
+        user_id: UUID,
+        ticker: Optional[str],
+        direction: Optional[DirectionEnum]
+    ) -> list[UUID]:
+        if ticker is not None:
+            tickers = [ticker]
+        else:
+            async with new_async_session() as session:
+                query = (
+                    select(OrderModel.ticker)
+                    .where(OrderModel.user_id == user_id)
+                    .where(OrderModel.status.in_(OPEN_STATUSES))
+                    .distinct()
+                )
+                if direction is not None:
+                    query = query.where(OrderModel.direction == direction)
+                tickers = (await session.scalars(query)).all()
+        if not tickers:
+            return []
+
+        async with AsyncExitStack() as stack:
+            engines = {
+                ticker: await stack.enter_async_context(self.get(ticker).exclusive())
+                for ticker in sorted(tickers)
+            }
+            return await with_retry(lambda: self._cancel_orders(user_id, direction, engines))
+
+    async def _cancel_orders(
+        self,
+        user_id: UUID,
+        direction: Optional[DirectionEnum],
+        engines: dict[str, TickerEngine]
+    ) -> list[UUID]:
+        async with new_async_session() as session:
+            for engine in engines.values():
+                await engine.sync(session)
+
+            # Тикеры ограничены заблокированными: заявка по новому тикеру не отменится мимо его стакана
+            query = (
+                update(OrderModel)
+                .where(OrderModel.user_id == user_id)
+                .where(OrderModel.status.in_(OPEN_STATUSES))
+                .where(OrderModel.ticker.in_(engines))
+                .values(status=StatusEnum.CANCELLED)
+                .returning(
+                    OrderModel.id,
+                    OrderModel.ticker,
+                    OrderModel.direction,
+                    OrderModel.qty,
+                    OrderModel.filled,
+                    OrderModel.price
+                )
+            )
+            if direction is not None:
+                query = query.where(OrderModel.direction == direction)
+            rows = (await session.execute(query)).all()
+            if not rows:
+                return []
+
+            settlement = Settlement()
+            cancelled = {}
+            events = {}
+            for order_id, ticker, order_direction, qty, filled, price in rows:
+                settlement.release(user_id, order_direction, ticker, qty - filled, price)
+                cancelled.setdefault(ticker, []).append(order_id)
+                events.setdefault(ticker, []).append(OrderCancelled(order_id, user_id, order_direction, qty - filled, price))
+            await settlement.apply(session)
+            seqs = {ticker: await engines[ticker].bump_seq(session) for ticker in sorted(cancelled)}
+            await commit_journaled(session, [JournalUnit(ticker, seqs[ticker], events[ticker]) for ticker in seqs])
+
+        for ticker, order_ids in cancelled.items():
+            engines[ticker].remove_orders(seqs[ticker], order_ids)
+        return [row[0] for row in rows]
+
+    async def loaded(self, ticker: str, max_age: float = BOOK_FRESHNESS) -> TickerEngine:
+        """Стакан для чтения без блокировок, сверенный с book_seq не раньше max_age секунд назад.
+
+        Заявки по тикеру могут сводиться в другом воркере, поэтому стакан,
+        который давно не сверялся, перечитывается перед отдачей.
+        """
+        engine = self._tickers.get(ticker)
+        if engine is None:
+            # Задача тикера создаётся только для существующего инструмента
+            await instrument_registry.require(ticker)
+            engine = self.get(ticker)
+        if not engine.fresh(max_age):
+            try:
+                await engine.submit(engine.refresh, max_age)
+            except HTTPException:
+                await self.discard(ticker)
+                raise
+        return engine
+
+    async def order_book(self, ticker: str) -> bytes:
+        engine = await self.loaded(ticker)
+        return engine.snapshot()
+
+    async def install(self, book: OrderBook):
+        engine = self.get(book.ticker)
+        await engine.submit(engine.install, book)
+
+    async def stop(self):
+        for engine in self._tickers.values():
+            await engine.stop()
+
+
+matching_engine = MatchingEngine()
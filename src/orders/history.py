@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, delete, insert, union_all, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import new_async_session, env_int
+from src.orders.models import OrderModel, OrderHistoryModel, StatusEnum
+from src.orders.engine import OPEN_STATUSES
+
+
+logger = logging.getLogger(__name__)
+
+HISTORY_BATCH_SIZE = env_int('ORDERS_HISTORY_BATCH_SIZE', 1000)
+HISTORY_INTERVAL = env_int('ORDERS_HISTORY_INTERVAL', 5)
+
+TERMINAL_STATUSES = (StatusEnum.EXECUTED, StatusEnum.CANCELLED)
+COLUMNS = [column.name for column in OrderModel.__table__.columns]
+
+
+def order_columns(model) -> tuple:
+    return (
+        model.id,
+        model.status,
+        model.user_id,
+        model.timestamp,
+        model.direction,
+        model.ticker,
+        model.qty,
+        model.price,
+        model.filled,
+    )
+
+def user_orders_query(
+    user_id: UUID,
+    order_status: Optional[StatusEnum] = None,
+    ticker: Optional[str] = None,
+    before: Optional[tuple[datetime, UUID]] = None,
+    limit: Optional[int] = None
+):
+    """Заявки пользователя из orders и orders_history, новые первыми."""
+    models = [OrderModel]
+    if order_status not in OPEN_STATUSES:
+        models.append(OrderHistoryModel)
+
+    branches = []
+    for model in models:
+        query = select(*order_columns(model)).where(model.user_id == user_id)
+        if order_status is not None:
+            query = query.where(model.status == order_status)
+        if ticker is not None:
+            query = query.where(model.ticker == ticker)
+        if before is not None:
+            query = query.where(tuple_(model.timestamp, model.id) < before)
+        if limit is not None:
+            # Каждая ветка сама отдаёт не больше limit строк по своему индексу
+            query = query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit)
+        branches.append(query)
+
+    orders = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery('user_orders')
+    query = select(*orders.c).order_by(orders.c.timestamp.desc(), orders.c.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+async def find_order(session: AsyncSession, order_id: UUID):
+    for model in (OrderModel, OrderHistoryModel):
+        order = (await session.execute(select(*order_columns(model)).where(model.id == order_id))).first()
+        if order is not None:
+            return order
+    return None
+
+
+def move_statement(limit: int):
+    # Строки, занятые идущим сведением или отменой, пропускаются и переедут в следующий раз
+    terminal = (
+        select(OrderModel.id)
+        .where(OrderModel.status.in_(TERMINAL_STATUSES))
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        delete(OrderModel)
+        .where(OrderModel.id.in_(terminal))
+        .returning(*OrderModel.__table__.columns)
+        .cte('moved')
+    )
+    return (
+        insert(OrderHistoryModel)
+        .from_select(COLUMNS, select(*(moved.c[name] for name in COLUMNS)))
+        .add_cte(moved)
+    )
+
+async def move_terminal_orders(session: AsyncSession, limit: int = HISTORY_BATCH_SIZE) -> int:
+    """Переносит до limit завершённых заявок из orders в orders_history одним запросом."""
+    result = await session.execute(move_statement(limit))
+    return result.rowcount
+
+
+async def drain_terminal_orders(limit: int = HISTORY_BATCH_SIZE) -> int:
+    total = 0
+    while True:
+        # Каждая пачка в своей транзакции, чтобы не держать блокировки на весь перенос
+        async with new_async_session() as session:
+            moved = await move_terminal_orders(session, limit)
+            await session.commit()
+        total += moved
+        if moved < limit:
+            return total
+
+async def run_history_mover(interval: float = HISTORY_INTERVAL):
+    while True:
+        try:
+            moved = await drain_terminal_orders()
+            if moved:
+                logger.info('Moved %d terminal orders to history', moved)
+        except Exception:
+            logger.exception('Moving terminal orders to history failed')
+        await asyncio.sleep(interval)
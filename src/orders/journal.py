@@ -0,0 +1,305 @@
+import asyncio
+import fcntl
+import glob
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Iterator, NamedTuple, Optional
+from uuid import UUID
+
+from src.database import env_int
+from src.orders.models import DirectionEnum, StatusEnum
+from src.monitoring.metrics import JOURNAL_SYNC, JOURNAL_BATCH
+
+
+logger = logging.getLogger(__name__)
+
+ORDER_JOURNAL_DIR = os.getenv('ORDER_JOURNAL_DIR', '')
+ORDER_JOURNAL_SEGMENT_SIZE = env_int('ORDER_JOURNAL_SEGMENT_SIZE', 64 * 1024 * 1024)
+
+SEGMENT_PATTERN = 'segment-*.log'
+
+DIRECTIONS = list(DirectionEnum)
+STATUSES = list(StatusEnum)
+
+# Кадр: длина и crc32 тела. Тело - одна транзакция сведения по тикеру:
+# тикер, book_seq после неё, время записи, флаг отката и число событий, затем события
+FRAME = struct.Struct('<II')
+UNIT = struct.Struct('<10sQQBH')
+ACCEPTED = struct.Struct('<16s16sBqqqBq')
+FILLED = struct.Struct('<16s16s16s16sBqqq')
+CANCELLED = struct.Struct('<16s16sBqq')
+
+UNIT_ABORTED = 1
+
+
+class EventKind(IntEnum):
+    ACCEPTED = 1
+    FILLED = 2
+    CANCELLED = 3
+
+
+class OrderAccepted(NamedTuple):
+    order_id: UUID
+    user_id: UUID
+    direction: DirectionEnum
+    qty: int
+    price: Optional[int]
+    filled: int
+    status: StatusEnum
+    timestamp: datetime
+
+
+class OrderFilled(NamedTuple):
+    trade_id: UUID
+    maker_id: UUID
+    buyer_id: UUID
+    seller_id: UUID
+    maker_direction: DirectionEnum
+    qty: int
+    price: int
+    timestamp: datetime
+
+
+class OrderCancelled(NamedTuple):
+    order_id: UUID
+    user_id: UUID
+    direction: DirectionEnum
+    remaining: int
+    price: int
+
+
+class JournalUnit(NamedTuple):
+    ticker: str
+    seq: int
+    events: list
+    aborted: bool = False
+    # Время добавления в журнал (ns), задаёт общий порядок кадров разных процессов
+    written_ns: int = 0
+
+
+def uuid_bytes(value) -> bytes:
+    return (value if isinstance(value, UUID) else UUID(str(value))).bytes
+
+def to_micros(moment: datetime) -> int:
+    return int(moment.timestamp() * 1_000_000)
+
+def from_micros(micros: int) -> datetime:
+    return datetime.fromtimestamp(micros / 1_000_000, timezone.utc)
+
+
+def encode_event(event) -> bytes:
+    if isinstance(event, OrderAccepted):
+        return bytes([EventKind.ACCEPTED]) + ACCEPTED.pack(
+            uuid_bytes(event.order_id),
+            uuid_bytes(event.user_id),
+            DIRECTIONS.index(event.direction),
+            event.qty,
+            event.price or 0,
+            event.filled,
+            STATUSES.index(event.status),
+            to_micros(event.timestamp)
+        )
+    if isinstance(event, OrderFilled):
+        return bytes([EventKind.FILLED]) + FILLED.pack(
+            uuid_bytes(event.trade_id),
+            uuid_bytes(event.maker_id),
+            uuid_bytes(event.buyer_id),
+            uuid_bytes(event.seller_id),
+            DIRECTIONS.index(event.maker_direction),
+            event.qty,
+            event.price,
+            to_micros(event.timestamp)
+        )
+    return bytes([EventKind.CANCELLED]) + CANCELLED.pack(
+        uuid_bytes(event.order_id),
+        uuid_bytes(event.user_id),
+        DIRECTIONS.index(event.direction),
+        event.remaining,
+        event.price
+    )
+
+def decode_event(buffer, offset: int) -> tuple[object, int]:
+    kind = buffer[offset]
+    offset += 1
+    if kind == EventKind.ACCEPTED:
+        order_id, user_id, direction, qty, price, filled, order_status, micros = ACCEPTED.unpack_from(buffer, offset)
+        event = OrderAccepted(
+            UUID(bytes=order_id), UUID(bytes=user_id), DIRECTIONS[direction], qty,
+            price or None, filled, STATUSES[order_status], from_micros(micros)
+        )
+        return event, offset + ACCEPTED.size
+    if kind == EventKind.FILLED:
+        trade_id, maker_id, buyer_id, seller_id, direction, qty, price, micros = FILLED.unpack_from(buffer, offset)
+        event = OrderFilled(
+            UUID(bytes=trade_id), UUID(bytes=maker_id), UUID(bytes=buyer_id), UUID(bytes=seller_id),
+            DIRECTIONS[direction], qty, price, from_micros(micros)
+        )
+        return event, offset + FILLED.size
+    if kind == EventKind.CANCELLED:
+        order_id, user_id, direction, remaining, price = CANCELLED.unpack_from(buffer, offset)
+        event = OrderCancelled(UUID(bytes=order_id), UUID(bytes=user_id), DIRECTIONS[direction], remaining, price)
+        return event, offset + CANCELLED.size
+    raise ValueError(f'Unknown journal event kind {kind}')
+
+
+def encode_unit(unit: JournalUnit) -> bytes:
+    body = UNIT.pack(
+        unit.ticker.encode(),
+        unit.seq,
+        unit.written_ns,
+        UNIT_ABORTED if unit.aborted else 0,
+        len(unit.events)
+    ) + b''.join(encode_event(event) for event in unit.events)
+    return FRAME.pack(len(body), zlib.crc32(body)) + body
+
+def decode_unit(buffer, offset: int) -> JournalUnit:
+    ticker, seq, written_ns, flags, count = UNIT.unpack_from(buffer, offset)
+    offset += UNIT.size
+    events = []
+    for _ in range(count):
+        event, offset = decode_event(buffer, offset)
+        events.append(event)
+    return JournalUnit(ticker.rstrip(b'\0').decode(), seq, events, bool(flags & UNIT_ABORTED), written_ns)
+
+
+def read_segment(path: str) -> Iterator[JournalUnit]:
+    """Читает кадры сегмента через mmap до конца файла или до первого оборванного кадра."""
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            offset = 0
+            while offset + FRAME.size <= size:
+                length, crc = FRAME.unpack_from(view, offset)
+                start = offset + FRAME.size
+                end = start + length
+                # Хвост, не дописанный до падения, не подтверждался клиенту
+                if end > size or zlib.crc32(view[start:end]) != crc:
+                    if end < size:
+                        logger.error('Corrupted journal frame in %s at offset %d', path, offset)
+                    return
+                yield decode_unit(view, start)
+                offset = end
+
+def segment_paths(directory: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+def read_journal(directory: str) -> Iterator[JournalUnit]:
+    for path in segment_paths(directory):
+        yield from read_segment(path)
+
+
+def segment_in_use(path: str) -> bool:
+    # Открытый сегмент держит flock записывающего процесса
+    with open(path, 'rb') as file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(file, fcntl.LOCK_UN)
+        return False
+
+
+class Journal:
+    """Журнал транзакций сведения, дописываемый в локальный файл.
+
+    Каждый процесс пишет свои сегменты. Кадры, добавленные пока идёт fsync
+    предыдущей пачки, записываются и синхронизируются следующей пачкой одним
+    вызовом, так что один fsync приходится сразу на много заявок.
+
+    Если откат записать не удалось, журнал больше не принимает транзакции:
+    иначе при старте применилась бы заявка, о неудаче которой клиенту уже
+    ответили.
+    """
+
+    def __init__(self, directory: str = ORDER_JOURNAL_DIR, segment_size: int = ORDER_JOURNAL_SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.path: Optional[str] = None
+        self._fd: Optional[int] = None
+        self._size = 0
+        self._pending: list[bytes] = []
+        self._waiters: list[asyncio.Future] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self.broken = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f'segment-{time.time_ns():020d}-{os.getpid()}.log')
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._size = 0
+
+    async def close(self):
+        if self._flusher is not None:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    async def append(self, units: list[JournalUnit]):
+        """Дописывает транзакции и ждёт, пока они окажутся на диске."""
+        if not units:
+            return
+        if self.broken:
+            raise RuntimeError('Order journal failed to record an abort, restart is required')
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        written_ns = time.time_ns()
+        self._pending.append(b''.join(encode_unit(unit._replace(written_ns=written_ns)) for unit in units))
+        self._waiters.append(waiter)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush())
+        await asyncio.shield(waiter)
+
+    async def abort(self, units: list[JournalUnit]):
+        # Транзакция не зафиксировалась в БД: при восстановлении её кадры пропускаются
+        try:
+            await self.append([unit._replace(events=[], aborted=True) for unit in units])
+        except Exception:
+            self.broken = True
+            logger.critical('Failed to journal aborted units, the journal stops accepting transactions', exc_info=True)
+
+    async def _flush(self):
+        while self._pending:
+            data, waiters = b''.join(self._pending), self._waiters
+            self._pending, self._waiters = [], []
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write, data)
+            except Exception as e:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                continue
+            JOURNAL_SYNC.observe(time.perf_counter() - started)
+            JOURNAL_BATCH.observe(len(waiters))
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def _write(self, data: bytes):
+        if self._fd is None or (self._size and self._size + len(data) > self.segment_size):
+            if self._fd is not None:
+                os.close(self._fd)
+            self.open()
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+        os.fdatasync(self._fd)
+        self._size += len(data)
+
+
+order_journal = Journal()
@@ -3,7 +3,7 @@ from uuid import uuid4
 from datetime import datetime, timezone
 
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Enum, String, Integer, ForeignKey, DateTime, func
+from sqlalchemy import Enum, String, Integer, ForeignKey, DateTime, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID
 
 from src.database import Base
@@ -19,9 +19,7 @@ class StatusEnum(PyEnum):
     PARTIALLY_EXECUTED = 'PARTIALLY_EXECUTED'
     CANCELLED = 'CANCELLED'
 
-class OrderModel(Base):
-    __tablename__ = 'orders'
-
+class OrderColumns:
     id: Mapped[str] = mapped_column(
         UUID,
         primary_key=True,
@@ -32,7 +30,6 @@ class OrderModel(Base):
     user_id: Mapped[str] = mapped_column(
         UUID,
         ForeignKey('users.id', ondelete='CASCADE'),
-        index=True,
         nullable=False
     )
 
@@ -72,6 +69,40 @@ class OrderModel(Base):
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
-        index=True,
         nullable=False
-    )
\ No newline at end of file
+    )
+
+
+class OrderModel(OrderColumns, Base):
+    __tablename__ = 'orders'
+    __table_args__ = (
+        Index(
+            'ix_orders_open_book',
+            'ticker',
+            'direction',
+            'price',
+            'timestamp',
+            postgresql_where=text("status IN ('NEW', 'PARTIALLY_EXECUTED')")
+        ),
+        Index('ix_orders_timestamp', 'timestamp'),
+        Index(
+            'ix_orders_terminal',
+            'id',
+            postgresql_where=text("status IN ('EXECUTED', 'CANCELLED')")
+        ),
+        Index('ix_orders_user_timestamp', 'user_id', 'timestamp', 'id'),
+        Index(
+            'ix_orders_user_open',
+            'user_id',
+            'ticker',
+            'direction',
+            postgresql_where=text("status IN ('NEW', 'PARTIALLY_EXECUTED')")
+        ),
+    )
+
+# Исполненные и отменённые заявки переносятся сюда, в orders остаются только активные
+class OrderHistoryModel(OrderColumns, Base):
+    __tablename__ = 'orders_history'
+    __table_args__ = (
+        Index('ix_orders_history_user_timestamp', 'user_id', 'timestamp', 'id'),
+    )
@@ -0,0 +1,244 @@
+"""Восстановление и сверка журнала сведения с БД.
+
+    python -m src.orders.recovery verify [--dir DIR]
+    python -m src.orders.recovery replay [--dir DIR]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+
+from sqlalchemy import select, update, insert, case, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import new_async_session
+from src.orders.models import OrderModel, OrderHistoryModel, StatusEnum, DirectionEnum
+from src.orders.contention import lock_tickers
+from src.orders.journal import (
+    ORDER_JOURNAL_DIR, JournalUnit, OrderAccepted, OrderFilled, OrderCancelled,
+    read_segment, segment_paths, segment_in_use
+)
+from src.instruments.models import InstrumentModel
+from src.transactions.bulk import TradeRow, write_trades
+from src.transactions.models import TransactionModel
+from src.balance.settlement import Settlement
+
+
+logger = logging.getLogger(__name__)
+
+VERIFY_CHUNK = 1000
+
+
+def segment_pid(path: str) -> str:
+    return os.path.basename(path).rsplit('.', 1)[0].rsplit('-', 1)[-1]
+
+def collect_units(paths: list[str]) -> list[JournalUnit]:
+    """Транзакции журнала без откаченных в общем порядке записи."""
+    latest = {}
+    for path in paths:
+        pid = segment_pid(path)
+        for unit in read_segment(path):
+            # Откат относится к последнему кадру того же процесса с этим seq:
+            # следующая транзакция по тикеру получит тот же seq заново
+            key = (pid, unit.ticker, unit.seq)
+            if unit.aborted:
+                latest.pop(key, None)
+            else:
+                latest[key] = unit
+    return sorted(latest.values(), key=lambda unit: (unit.written_ns, unit.seq))
+
+def units_by_ticker(units: list[JournalUnit]) -> dict[str, dict[int, JournalUnit]]:
+    grouped = defaultdict(dict)
+    for unit in units:
+        grouped[unit.ticker][unit.seq] = unit
+    return grouped
+
+async def book_seqs(session: AsyncSession) -> dict[str, int]:
+    return dict((await session.execute(select(InstrumentModel.ticker, InstrumentModel.book_seq))).all())
+
+
+async def apply_unit(session: AsyncSession, unit: JournalUnit):
+    """Повторяет действия транзакции сведения по её событиям."""
+    settlement = Settlement()
+    trades = []
+    status_type = OrderModel.__table__.c.status.type
+    for event in unit.events:
+        if isinstance(event, OrderAccepted):
+            model = OrderHistoryModel if event.status == StatusEnum.EXECUTED else OrderModel
+            await session.execute(insert(model).values(
+                id=event.order_id,
+                user_id=event.user_id,
+                ticker=unit.ticker,
+                direction=event.direction,
+                qty=event.qty,
+                price=event.price,
+                filled=event.filled,
+                status=event.status,
+                timestamp=event.timestamp
+            ))
+            if event.price is not None and event.status != StatusEnum.EXECUTED:
+                settlement.reserve(event.user_id, event.direction, unit.ticker, event.qty - event.filled, event.price)
+        elif isinstance(event, OrderFilled):
+            new_filled = OrderModel.filled + event.qty
+            await session.execute(
+                update(OrderModel)
+                .where(OrderModel.id == event.maker_id)
+                .values(
+                    filled=new_filled,
+                    status=case(
+                        (new_filled == OrderModel.qty, cast(StatusEnum.EXECUTED, status_type)),
+                        else_=cast(StatusEnum.PARTIALLY_EXECUTED, status_type)
+                    )
+                )
+            )
+            maker_id = event.seller_id if event.maker_direction == DirectionEnum.SELL else event.buyer_id
+            settlement.transfer(event.buyer_id, event.seller_id, unit.ticker, event.qty, event.price)
+            settlement.release(maker_id, event.maker_direction, unit.ticker, event.qty, event.price)
+            trades.append(TradeRow(
+                event.trade_id, event.buyer_id, event.seller_id, unit.ticker, event.qty, event.price, event.timestamp
+            ))
+        elif isinstance(event, OrderCancelled):
+            await session.execute(
+                update(OrderModel)
+                .where(OrderModel.id == event.order_id)
+                .values(status=StatusEnum.CANCELLED)
+            )
+            settlement.release(event.user_id, event.direction, unit.ticker, event.remaining, event.price)
+    await write_trades(session, trades)
+    # Остатки проверялись при сведении, здесь порядок уже задан журналом
+    await settlement.apply(session, check=False)
+    await session.execute(
+        update(InstrumentModel)
+        .where(InstrumentModel.ticker == unit.ticker)
+        .values(book_seq=unit.seq)
+    )
+
+async def replay_unit(unit: JournalUnit) -> bool:
+    async with new_async_session() as session:
+        await lock_tickers(session, [unit.ticker])
+        current = await session.scalar(
+            select(InstrumentModel.book_seq).where(InstrumentModel.ticker == unit.ticker)
+        )
+        if current is None or unit.seq <= current:
+            return False
+        if unit.seq != current + 1:
+            raise RuntimeError(
+                f'Journal for {unit.ticker} has a gap: DB is at seq {current}, next journaled seq is {unit.seq}'
+            )
+        await apply_unit(session, unit)
+        await session.commit()
+    return True
+
+async def recover_journal(directory: str = ORDER_JOURNAL_DIR) -> int:
+    """Применяет транзакции журнала, которые БД потеряла, и удаляет полностью спроецированные сегменты.
+
+    Проекцией считается book_seq тикера: транзакция с seq больше book_seq в БД не
+    зафиксирована. Транзакции, о неудаче которых клиенту ответили, закрыты в
+    журнале кадром отката, поэтому применяются только те, что прервало падение
+    процесса между записью в журнал и коммитом. Транзакции применяются в порядке записи в журнал по всем
+    тикерам сразу, так что балансы проходят те же состояния, что и при сведении.
+    Ошибка прерывает восстановление: сервис не должен стартовать и выдавать
+    новые seq поверх непримененного журнала. Повторный запуск безопасен.
+    """
+    if not directory or not os.path.isdir(directory):
+        return 0
+    paths = [path for path in segment_paths(directory) if not segment_in_use(path)]
+    replayed = 0
+    for unit in collect_units(paths):
+        replayed += await replay_unit(unit)
+    if replayed:
+        logger.info('Replayed %d journaled transactions', replayed)
+
+    async with new_async_session() as session:
+        seqs = await book_seqs(session)
+    for path in paths:
+        if all(unit.seq <= seqs.get(unit.ticker, unit.seq) for unit in read_segment(path)):
+            os.remove(path)
+    return replayed
+
+
+@dataclass(slots=True)
+class TickerReport:
+    journal_seq: int = 0
+    db_seq: int = 0
+    unprojected: list[int] = field(default_factory=list)
+    missing_orders: list[str] = field(default_factory=list)
+    missing_trades: list[str] = field(default_factory=list)
+    not_cancelled: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.unprojected or self.missing_orders or self.missing_trades or self.not_cancelled)
+
+
+async def existing_ids(session: AsyncSession, column, ids: list) -> set:
+    found = set()
+    for start in range(0, len(ids), VERIFY_CHUNK):
+        found.update(await session.scalars(select(column).where(column.in_(ids[start:start + VERIFY_CHUNK]))))
+    return {str(value) for value in found}
+
+async def cancelled_ids(session: AsyncSession, ids: list) -> set:
+    found = set()
+    for model in (OrderModel, OrderHistoryModel):
+        for start in range(0, len(ids), VERIFY_CHUNK):
+            found.update(await session.scalars(
+                select(model.id)
+                .where(model.id.in_(ids[start:start + VERIFY_CHUNK]))
+                .where(model.status == StatusEnum.CANCELLED)
+            ))
+    return {str(value) for value in found}
+
+async def verify_journal(directory: str = ORDER_JOURNAL_DIR) -> dict[str, TickerReport]:
+    """Сверяет журнал с БД: все спроецированные заявки, сделки и отмены должны быть в таблицах."""
+    units = units_by_ticker(collect_units(segment_paths(directory)))
+    reports = {}
+    async with new_async_session() as session:
+        seqs = await book_seqs(session)
+        for ticker, ticker_units in sorted(units.items()):
+            report = reports[ticker] = TickerReport(journal_seq=max(ticker_units), db_seq=seqs.get(ticker, 0))
+            orders, trades, cancels = [], [], []
+            for seq, unit in sorted(ticker_units.items()):
+                if seq > report.db_seq:
+                    report.unprojected.append(seq)
+                    continue
+                for event in unit.events:
+                    if isinstance(event, OrderAccepted):
+                        orders.append(event.order_id)
+                    elif isinstance(event, OrderFilled):
+                        trades.append(event.trade_id)
+                    else:
+                        cancels.append(event.order_id)
+
+            found = await existing_ids(session, OrderModel.id, orders) | await existing_ids(session, OrderHistoryModel.id, orders)
+            report.missing_orders = [str(order_id) for order_id in orders if str(order_id) not in found]
+            found = await existing_ids(session, TransactionModel.id, trades)
+            report.missing_trades = [str(trade_id) for trade_id in trades if str(trade_id) not in found]
+            found = await cancelled_ids(session, cancels)
+            report.not_cancelled = [str(order_id) for order_id in cancels if str(order_id) not in found]
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['verify', 'replay'])
+    parser.add_argument('--dir', default=ORDER_JOURNAL_DIR, help='journal directory (ORDER_JOURNAL_DIR)')
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error('journal directory is not set')
+
+    if args.command == 'replay':
+        print(json.dumps({'replayed': asyncio.run(recover_journal(args.dir))}))
+        return
+
+    reports = asyncio.run(verify_journal(args.dir))
+    print(json.dumps({ticker: asdict(report) for ticker, report in reports.items()}, indent=2))
+    if not all(report.ok for report in reports.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
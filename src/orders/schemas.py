@@ -1,5 +1,5 @@
-from typing import Union, Literal
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Union, Literal
+from pydantic import BaseModel, Discriminator, Field, Tag, TypeAdapter
 from datetime import datetime
 from uuid import UUID
 from typing import List
@@ -27,18 +27,53 @@ class LimitOrderSchema(OrderSchema):
 class MarketOrderSchema(OrderSchema):
     body: MarketOrderBodySchema
 
-OrderBodySchema = Union[LimitOrderBodySchema, MarketOrderBodySchema]
+def order_body_kind(value) -> str:
+    # Тип заявки определяется наличием цены, а не перебором вариантов Union
+    if isinstance(value, dict):
+        return 'limit' if 'price' in value else 'market'
+    return 'limit' if getattr(value, 'price', None) is not None else 'market'
+
+OrderBodySchema = Annotated[
+    Union[
+        Annotated[LimitOrderBodySchema, Tag('limit')],
+        Annotated[MarketOrderBodySchema, Tag('market')],
+    ],
+    Discriminator(order_body_kind),
+]
 
 OrderResponseSchema = Union[LimitOrderSchema, MarketOrderSchema]
 
+order_adapter = TypeAdapter(OrderResponseSchema)
+orders_adapter = TypeAdapter(list[OrderResponseSchema])
+
 class CreateOrderResponseSchema(BaseModel):
     success: Literal[True] = Field(default=True)
     order_id: UUID
 
+class BatchOrderResultSchema(BaseModel):
+    success: bool
+    order_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+class CancelOrdersResponseSchema(BaseModel):
+    success: Literal[True] = Field(default=True)
+    cancelled: List[UUID]
+
 class OrderLevel(BaseModel):
     price: int
     qty: int
 
 class OrderBookListSchema(BaseModel):
     bid_levels: List[OrderLevel]
-    ask_levels: List[OrderLevel]
\ No newline at end of file
+    ask_levels: List[OrderLevel]
+    seq: int = Field(default=0)
+
+class QuoteResponseSchema(BaseModel):
+    ticker: str
+    direction: DirectionEnum
+    qty: int
+    available_qty: int
+    sufficient: bool
+    average_price: Optional[float] = None
+    worst_price: Optional[int] = None
+    seq: int = Field(default=0)
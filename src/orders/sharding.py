@@ -0,0 +1,267 @@
+import asyncio
+import bisect
+import fcntl
+import json
+import logging
+import os
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from src.orders.contention import stable_hash
+from src.orders.engine import matching_engine, OrderResult
+from src.orders.models import DirectionEnum, StatusEnum
+
+
+logger = logging.getLogger(__name__)
+
+ORDER_SHARDS = int(os.getenv('ORDER_SHARDS', '0'))
+ORDER_SHARD_DIR = os.getenv('ORDER_SHARD_DIR', '/tmp/birzha-shards')
+ORDER_SHARD_VNODES = int(os.getenv('ORDER_SHARD_VNODES', '64'))
+ORDER_SHARD_CONNECTIONS = int(os.getenv('ORDER_SHARD_CONNECTIONS', '8'))
+ORDER_SHARD_TIMEOUT = float(os.getenv('ORDER_SHARD_TIMEOUT', '30'))
+
+
+class HashRing:
+    def __init__(self, shards: int, vnodes: int = ORDER_SHARD_VNODES):
+        points = sorted(
+            (stable_hash(f'shard-{shard}-{vnode}'), shard)
+            for shard in range(shards)
+            for vnode in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard(self, ticker: str) -> int:
+        index = bisect.bisect(self._hashes, stable_hash(ticker)) % len(self._hashes)
+        return self._shards[index]
+
+
+def result_to_message(result: OrderResult) -> dict:
+    if result.error is not None:
+        return {'error': result.error}
+    return {'order_id': str(result.order_id), 'filled': result.filled, 'status': result.status.value}
+
+def message_to_result(message: dict) -> OrderResult:
+    if 'error' in message:
+        return OrderResult(order_id=None, filled=0, status=None, error=message['error'])
+    return OrderResult(order_id=message['order_id'], filled=message['filled'], status=StatusEnum(message['status']))
+
+
+class ShardConnections:
+    """Пул соединений с сокетом воркера-владельца шарда: один запрос на соединение за раз."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(size)
+
+    async def request(self, message: dict) -> dict:
+        async with self._slots:
+            try:
+                reader, writer = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            try:
+                writer.write(json.dumps(message).encode() + b'\n')
+                await writer.drain()
+                line = await asyncio.wait_for(reader.readline(), ORDER_SHARD_TIMEOUT)
+                if not line:
+                    raise ConnectionError(f'Shard socket {self.path} closed')
+            except BaseException:
+                writer.close()
+                raise
+            self._idle.put_nowait((reader, writer))
+        return json.loads(line)
+
+    def close(self):
+        while not self._idle.empty():
+            _, writer = self._idle.get_nowait()
+            writer.close()
+
+
+class ShardRouter:
+    """Направляет заявки тикера в единственный воркер, который им владеет.
+
+    Воркер при старте захватывает flock на файл свободного шарда и слушает
+    его Unix-сокет. Тикеры распределяются по шардам консистентным хешированием,
+    заявки чужих тикеров пересылаются владельцу строкой JSON. Без ORDER_SHARDS
+    все заявки исполняются в текущем процессе.
+    """
+
+    def __init__(self, shards: int, directory: str):
+        self.shards = shards
+        self.directory = directory
+        self.ring = HashRing(shards) if shards else None
+        self.shard: Optional[int] = None
+        self._lock_file = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: dict[int, ShardConnections] = {}
+
+    def socket_path(self, shard: int) -> str:
+        return os.path.join(self.directory, f'shard-{shard}.sock')
+
+    def owns(self, ticker: str) -> bool:
+        return self.ring is None or self.ring.shard(ticker) == self.shard
+
+    async def start(self):
+        if not self.shards:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for shard in range(self.shards):
+            lock_file = open(os.path.join(self.directory, f'shard-{shard}.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            # Блокировка снимается ОС при смерти процесса, и перезапущенный воркер занимает шард заново
+            self._lock_file = lock_file
+            self.shard = shard
+            break
+        if self.shard is None:
+            logger.warning('All %d order shards are taken, this worker only forwards orders', self.shards)
+            return
+
+        path = self.socket_path(self.shard)
+        if os.path.exists(path):
+            os.unlink(path)
+        self._server = await asyncio.start_unix_server(self._serve, path=path)
+        logger.info('Worker %d owns order shard %d', os.getpid(), self.shard)
+
+    async def stop(self):
+        for connections in self._connections.values():
+            connections.close()
+        self._connections.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+            self.shard = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                response = await self._execute(json.loads(line))
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _execute(self, message: dict) -> dict:
+        try:
+            user_id = UUID(message['user_id'])
+            if message['op'] == 'place':
+                result = await matching_engine.place_order(
+                    message['ticker'],
+                    user_id,
+                    DirectionEnum(message['direction']),
+                    message['qty'],
+                    message['price']
+                )
+                return {'ok': True, 'result': result_to_message(result)}
+            if message['op'] == 'place_batch':
+                results = await matching_engine.place_orders(user_id, [
+                    (ticker, DirectionEnum(direction), qty, price)
+                    for ticker, direction, qty, price in message['orders']
+                ])
+                return {'ok': True, 'results': [result_to_message(result) for result in results]}
+            if message['op'] == 'cancel_all':
+                cancelled = await matching_engine.cancel_orders(
+                    user_id,
+                    message['ticker'],
+                    DirectionEnum(message['direction']) if message['direction'] else None
+                )
+                return {'ok': True, 'cancelled': [str(order_id) for order_id in cancelled]}
+            await matching_engine.cancel_order(message['ticker'], user_id, UUID(message['order_id']))
+            return {'ok': True}
+        except HTTPException as e:
+            return {'ok': False, 'status': e.status_code, 'detail': e.detail}
+        except Exception as e:
+            logger.exception('Forwarded order failed')
+            return {'ok': False, 'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'detail': f'Shard error: {e}'}
+
+    async def _forward(self, shard: int, message: dict) -> dict:
+        connections = self._connections.get(shard)
+        if connections is None:
+            connections = ShardConnections(self.socket_path(shard), ORDER_SHARD_CONNECTIONS)
+            self._connections[shard] = connections
+        try:
+            response = await connections.request(message)
+        except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f'Order shard {shard} is unavailable'
+            ) from e
+        if not response['ok']:
+            raise HTTPException(status_code=response['status'], detail=response['detail'])
+        return response
+
+    async def place_order(
+        self,
+        ticker: str,
+        user_id: UUID,
+        direction: DirectionEnum,
+        qty: int,
+        price: Optional[int]
+    ) -> OrderResult:
+        if self.owns(ticker):
+            return await matching_engine.place_order(ticker, user_id, direction, qty, price)
+        response = await self._forward(self.ring.shard(ticker), {
+            'op': 'place',
+            'ticker': ticker,
+            'user_id': str(user_id),
+            'direction': direction.value,
+            'qty': qty,
+            'price': price
+        })
+        return message_to_result(response['result'])
+
+    async def place_orders(self, user_id: UUID, orders: list[tuple]) -> list[OrderResult]:
+        shards = {self.ring.shard(order[0]) for order in orders} if self.ring else {self.shard}
+        # Пакет из разных шардов исполняется одной транзакцией здесь: согласованность
+        # со стаканами владельцев обеспечивает book_seq, просто без выигрыша от шардирования
+        if len(shards) > 1 or self.shard in shards:
+            return await matching_engine.place_orders(user_id, orders)
+        response = await self._forward(shards.pop(), {
+            'op': 'place_batch',
+            'user_id': str(user_id),
+            'orders': [(ticker, direction.value, qty, price) for ticker, direction, qty, price in orders]
+        })
+        return [message_to_result(result) for result in response['results']]
+
+    async def cancel_order(self, ticker: str, user_id: UUID, order_id: UUID):
+        if self.owns(ticker):
+            return await matching_engine.cancel_order(ticker, user_id, order_id)
+        await self._forward(self.ring.shard(ticker), {
+            'op': 'cancel',
+            'ticker': ticker,
+            'user_id': str(user_id),
+            'order_id': str(order_id)
+        })
+
+    async def cancel_orders(
+        self,
+        user_id: UUID,
+        ticker: Optional[str],
+        direction: Optional[DirectionEnum]
+    ) -> list[UUID]:
+        # Отмена по всем тикерам идёт одной транзакцией здесь, как пакет из разных шардов
+        if ticker is None or self.owns(ticker):
+            return await matching_engine.cancel_orders(user_id, ticker, direction)
+        response = await self._forward(self.ring.shard(ticker), {
+            'op': 'cancel_all',
+            'ticker': ticker,
+            'user_id': str(user_id),
+            'direction': direction.value if direction else None
+        })
+        return [UUID(order_id) for order_id in response['cancelled']]
+
+
+order_shards = ShardRouter(ORDER_SHARDS, ORDER_SHARD_DIR)
@@ -0,0 +1,22 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+CURSOR_HEADER = 'X-Next-Cursor'
+PREV_CURSOR_HEADER = 'X-Prev-Cursor'
+
+def encode_cursor(timestamp: datetime, id: UUID) -> str:
+    return urlsafe_b64encode(f'{timestamp.isoformat()}|{id}'.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        timestamp, id = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), UUID(id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
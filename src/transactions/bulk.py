@@ -0,0 +1,50 @@
+import os
+from datetime import datetime
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.transactions.models import TransactionModel
+
+
+TRADE_COPY_THRESHOLD = int(os.getenv('TRADE_COPY_THRESHOLD', '500'))
+
+transactions_table = TransactionModel.__table__
+
+
+class TradeRow(NamedTuple):
+    id: UUID
+    buyer_id: UUID
+    seller_id: UUID
+    ticker: str
+    amount: int
+    price: int
+    timestamp: datetime
+
+
+async def insert_trades(session: AsyncSession, trades: list[TradeRow]):
+    # С RETURNING SQLAlchemy собирает строки в многострочный INSERT (insertmanyvalues),
+    # а не выполняет INSERT на каждую сделку
+    await session.execute(
+        insert(transactions_table).returning(transactions_table.c.id),
+        [trade._asdict() for trade in trades]
+    )
+
+async def copy_trades(session: AsyncSession, trades: list[TradeRow]):
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        transactions_table.name,
+        records=trades,
+        columns=TradeRow._fields
+    )
+
+async def write_trades(session: AsyncSession, trades: list[TradeRow]):
+    if not trades:
+        return
+    if len(trades) >= TRADE_COPY_THRESHOLD:
+        await copy_trades(session, trades)
+    else:
+        await insert_trades(session, trades)
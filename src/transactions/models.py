@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Enum
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Enum, Index, desc
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 from uuid import uuid4
@@ -9,6 +9,10 @@ from src.database import Base
 
 class TransactionModel(Base):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        Index('ix_transactions_ticker_timestamp', 'ticker', desc('timestamp'), 'id'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
 
     id: Mapped[str] = mapped_column(
         UUID,
@@ -44,8 +48,10 @@ class TransactionModel(Base):
         nullable=False
     )
 
+    # Ключ секционирования обязан входить в первичный ключ
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
+        primary_key=True,
         nullable=False
     )
\ No newline at end of file
@@ -0,0 +1,199 @@
+import asyncio
+import gzip
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text, select, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import new_async_session, env_int, env_bool
+from src.transactions.models import TransactionModel
+
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS_AHEAD = env_int('TRANSACTIONS_PARTITIONS_AHEAD', 3)
+RETENTION_MONTHS = env_int('TRANSACTIONS_RETENTION_MONTHS', 12)
+# Каталог архива должен лежать на постоянном томе, без него архивирование отключено
+ARCHIVE_DIR = os.getenv('TRANSACTIONS_ARCHIVE_DIR', '')
+ARCHIVE_LOCK_TIMEOUT_MS = env_int('TRANSACTIONS_ARCHIVE_LOCK_TIMEOUT_MS', 1000)
+ARCHIVE_DETACH_ATTEMPTS = env_int('TRANSACTIONS_ARCHIVE_DETACH_ATTEMPTS', 5)
+ARCHIVE_AUTO = env_bool('TRANSACTIONS_ARCHIVE_AUTO')
+MAINTENANCE_INTERVAL = env_int('TRANSACTIONS_MAINTENANCE_INTERVAL', 6 * 3600)
+
+PARENT = TransactionModel.__tablename__
+PARTITION_NAME = re.compile(rf'^{PARENT}_y(\d{{4}})m(\d{{2}})$')
+# Ключ advisory-блокировки обслуживания: его выполняет только один воркер
+MAINTENANCE_LOCK_KEY = 0x7472616e73
+
+
+class MaintenanceInProgress(RuntimeError):
+    pass
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+def partition_name(month: datetime) -> str:
+    return f'{PARENT}_y{month.year:04d}m{month.month:02d}'
+
+def partition_month(name: str) -> Optional[datetime]:
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+async def ensure_partitions(session: AsyncSession, now: datetime, ahead: int = PARTITIONS_AHEAD) -> list[str]:
+    """Создаёт недостающие помесячные секции с текущего месяца на ahead месяцев вперёд."""
+    existing = set(await partition_tables(session))
+    created = []
+    current = month_start(now)
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+async def partition_tables(session: AsyncSession) -> list[str]:
+    # Отсоединённые, но ещё не выгруженные секции тоже попадают в список по имени
+    names = await session.scalars(
+        text("SELECT relname FROM pg_class WHERE relkind IN ('r', 'p') AND relname LIKE :pattern")
+        .bindparams(pattern=f'{PARENT}_y%')
+    )
+    return sorted(name for name in names if PARTITION_NAME.match(name))
+
+async def attached_partitions(session: AsyncSession) -> set[str]:
+    names = await session.scalars(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent"
+    ).bindparams(parent=PARENT))
+    return set(names)
+
+
+@dataclass(slots=True)
+class ArchivedPartition:
+    name: str
+    path: str
+    rows: int
+
+
+async def export_partition(session: AsyncSession, name: str, directory: str) -> tuple[str, int]:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{name}.csv.gz')
+    partial = path + '.partial'
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    with gzip.open(partial, 'wb') as file:
+        status = await raw.driver_connection.copy_from_table(name, output=file, format='csv', header=True)
+    # Файл появляется под итоговым именем только целиком
+    os.replace(partial, path)
+    return path, int(status.split()[-1])
+
+async def detach_and_drop(name: str, attached: bool):
+    """Отсоединяет и удаляет выгруженную секцию.
+
+    DETACH берёт эксклюзивную блокировку родительской таблицы и, пока ждёт её,
+    задерживает вставки сделок, поэтому ожидание ограничено коротким lock_timeout
+    с повторами. DETACH CONCURRENTLY недоступен из-за секции DEFAULT.
+    """
+    for attempt in range(ARCHIVE_DETACH_ATTEMPTS):
+        try:
+            async with new_async_session() as session:
+                await session.execute(text(f'SET LOCAL lock_timeout = {ARCHIVE_LOCK_TIMEOUT_MS}'))
+                if attached:
+                    await session.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION {name}'))
+                await session.execute(text(f'DROP TABLE {name}'))
+                await session.commit()
+            return
+        except DBAPIError as e:
+            if getattr(e.orig, 'sqlstate', None) != '55P03' or attempt == ARCHIVE_DETACH_ATTEMPTS - 1:
+                raise
+            logger.warning('Lock timeout detaching %s, retrying', name)
+            await asyncio.sleep(2 ** attempt)
+
+@asynccontextmanager
+async def maintenance_lock():
+    """Держит блокировку обслуживания в отдельной транзакции, пока выполняется блок."""
+    async with new_async_session() as session:
+        locked = await session.scalar(select(func.pg_try_advisory_xact_lock(MAINTENANCE_LOCK_KEY)))
+        if not locked:
+            raise MaintenanceInProgress('Transactions partition maintenance is already running')
+        yield
+
+async def archive_partitions(
+    before: datetime,
+    directory: str = ARCHIVE_DIR
+) -> list[ArchivedPartition]:
+    """Выгружает секции старше before в csv.gz, затем отсоединяет и удаляет их.
+
+    Секция выгружается, пока она ещё присоединена, и удаляется только после
+    записи файла: упавший запуск ничего не теряет и повторяется целиком.
+    Прошедшие месяцы не получают новых сделок, поэтому выгрузка полная.
+    Запуск держит блокировку обслуживания: пока она занята другим воркером,
+    выбрасывается MaintenanceInProgress.
+    """
+    if not directory:
+        raise RuntimeError('Transactions archive directory is not configured (TRANSACTIONS_ARCHIVE_DIR)')
+    before = month_start(before)
+    archived = []
+    async with maintenance_lock():
+        async with new_async_session() as session:
+            names = [name for name in await partition_tables(session) if partition_month(name) < before]
+            attached = await attached_partitions(session)
+
+        for name in names:
+            async with new_async_session() as session:
+                # Выгрузка секции за месяц дольше обычного statement_timeout
+                await session.execute(text('SET LOCAL statement_timeout = 0'))
+                path, rows = await export_partition(session, name, directory)
+                await session.commit()
+            await detach_and_drop(name, name in attached)
+
+            logger.info('Archived %s (%d rows) to %s', name, rows, path)
+            archived.append(ArchivedPartition(name, path, rows))
+    return archived
+
+
+async def maintain_partitions(now: Optional[datetime] = None):
+    now = now or datetime.now(timezone.utc)
+    async with new_async_session() as session:
+        locked = await session.scalar(select(func.pg_try_advisory_xact_lock(MAINTENANCE_LOCK_KEY)))
+        if not locked:
+            return
+        created = await ensure_partitions(session, now)
+        await session.commit()
+    if created:
+        logger.info('Created transactions partitions: %s', ', '.join(created))
+    if ARCHIVE_AUTO and RETENTION_MONTHS > 0 and ARCHIVE_DIR:
+        # Блокировка создания секций уже отпущена: архив берёт её заново и мог быть запущен вручную
+        try:
+            await archive_partitions(add_months(month_start(now), -RETENTION_MONTHS))
+        except MaintenanceInProgress:
+            logger.info('Transactions archive is already running, skipping')
+
+async def run_maintenance(interval: float = MAINTENANCE_INTERVAL):
+    while True:
+        try:
+            await maintain_partitions()
+        except Exception:
+            logger.exception('Transactions partition maintenance failed')
+        await asyncio.sleep(interval)
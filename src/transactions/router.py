@@ -1,34 +1,134 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy import select, desc
+from datetime import date, datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, and_, or_
 
 from src.database import SessionDep
+from src.pagination import CURSOR_HEADER, PREV_CURSOR_HEADER, encode_cursor, decode_cursor
 from src.transactions.models import TransactionModel
-from src.transactions.schemas import TransactionRescponseSchema
-from src.instruments.models import InstrumentModel
+from src.transactions.schemas import TransactionRescponseSchema, ArchivedPartitionSchema, transactions_adapter
+from src.transactions.partitions import archive_partitions, month_start, ARCHIVE_DIR, MaintenanceInProgress
+from src.users.dependencies import get_current_admin
+from src.instruments.registry import instrument_registry
 
 
 transaction_router = APIRouter()
 
+TRANSACTIONS_LIMIT_MAX = 500
+
+def history_query(
+    ticker: str,
+    limit: int,
+    before: Optional[tuple[datetime, UUID]] = None,
+    after: Optional[tuple[datetime, UUID]] = None
+):
+    """Страница ленты сделок по курсору.
+
+    Порядок (timestamp DESC, id ASC) совпадает с индексом ix_transactions_ticker_timestamp.
+    Условие курсора с OR индекс ограничить не может, поэтому к нему добавлена
+    избыточная граница по timestamp: по ней сужается диапазон индекса и
+    отсекаются секции.
+    """
+    query = (
+        select(
+            TransactionModel.id,
+            TransactionModel.ticker,
+            TransactionModel.amount,
+            TransactionModel.price,
+            TransactionModel.timestamp
+        )
+        .where(TransactionModel.ticker == ticker)
+        .limit(limit)
+    )
+    if after is not None:
+        timestamp, id = after
+        return query.where(
+            TransactionModel.timestamp >= timestamp,
+            or_(
+                TransactionModel.timestamp > timestamp,
+                and_(TransactionModel.timestamp == timestamp, TransactionModel.id < id)
+            )
+        ).order_by(TransactionModel.timestamp.asc(), TransactionModel.id.desc())
+
+    query = query.order_by(TransactionModel.timestamp.desc(), TransactionModel.id.asc())
+    if before is not None:
+        timestamp, id = before
+        query = query.where(
+            TransactionModel.timestamp <= timestamp,
+            or_(
+                TransactionModel.timestamp < timestamp,
+                and_(TransactionModel.timestamp == timestamp, TransactionModel.id > id)
+            )
+        )
+    return query
+
 @transaction_router.get('/api/v1/public/transactions/{ticker}', response_model=list[TransactionRescponseSchema], tags=['public'])
 async def get_transaction_history(
     session: SessionDep,
     ticker: str,
-    limit: int = 10
+    limit: int = Query(default=10, ge=1, le=TRANSACTIONS_LIMIT_MAX),
+    before: Optional[str] = None,
+    after: Optional[str] = None
 ):
-    instrument = await session.scalar(
-        select(InstrumentModel).where(InstrumentModel.ticker == ticker)
-    )
-    if not instrument:
+    if before is not None and after is not None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Instrument not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either before or after cursor"
         )
 
-    transactions = await session.scalars(
-        select(TransactionModel)
-        .where(TransactionModel.ticker == ticker)
-        .order_by(desc(TransactionModel.timestamp))
-        .limit(limit)
+    query = history_query(
+        ticker,
+        limit,
+        decode_cursor(before) if before is not None else None,
+        decode_cursor(after) if after is not None else None
     )
+    transactions = (await session.execute(query)).all()
+    if after is not None:
+        transactions.reverse()
+
+    if not transactions:
+        # Отдельная проверка инструмента нужна только для пустой ленты
+        await instrument_registry.require(ticker)
+        return []
 
-    return transactions.all()
\ No newline at end of file
+    headers = {PREV_CURSOR_HEADER: encode_cursor(transactions[0].timestamp, transactions[0].id)}
+    if len(transactions) == limit:
+        headers[CURSOR_HEADER] = encode_cursor(transactions[-1].timestamp, transactions[-1].id)
+    content = transactions_adapter.dump_json([
+        TransactionRescponseSchema.model_construct(
+            ticker=transaction.ticker,
+            amount=transaction.amount,
+            price=transaction.price,
+            timestamp=transaction.timestamp
+        )
+        for transaction in transactions
+    ])
+    return Response(content=content, media_type='application/json', headers=headers)
+
+@transaction_router.post('/api/v1/admin/transactions/archive', response_model=list[ArchivedPartitionSchema], tags=['admin'])
+async def archive_transactions(
+    before: date,
+    admin_user = Depends(get_current_admin)
+):
+    before = datetime(before.year, before.month, before.day, tzinfo=timezone.utc)
+    if month_start(before) > month_start(datetime.now(timezone.utc)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only past months can be archived"
+        )
+    if not ARCHIVE_DIR:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Archive directory is not configured"
+        )
+    # Архивируются только месяцы целиком: секции, закончившиеся до начала месяца before
+    try:
+        archived = await archive_partitions(before)
+    except MaintenanceInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Transactions maintenance is already running"
+        )
+    return [ArchivedPartitionSchema(name=item.name, path=item.path, rows=item.rows) for item in archived]
@@ -1,11 +1,18 @@
 from uuid import UUID
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 class TransactionRescponseSchema(BaseModel):
     ticker: str
     amount: int
     price: int
-    timestamp: datetime
\ No newline at end of file
+    timestamp: datetime
+
+class ArchivedPartitionSchema(BaseModel):
+    name: str
+    path: str
+    rows: int
+
+transactions_adapter = TypeAdapter(list[TransactionRescponseSchema])
@@ -0,0 +1,110 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from src.broadcast import broadcast
+from src.users.models import RoleEnum
+
+
+@dataclass(frozen=True, slots=True)
+class UserIdentity:
+    id: UUID
+    role: RoleEnum
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        item = self._items.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return default
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: str, value: Any):
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def evict(self, key: str):
+        self._items.pop(key, None)
+
+    def evict_values(self, predicate: Callable[[Any], bool]):
+        for key in [key for key, (_, value) in self._items.items() if predicate(value)]:
+            del self._items[key]
+
+    def clear(self):
+        self._items.clear()
+
+
+class ApiKeyCache:
+    """api_key -> UserIdentity. Неизвестные ключи хранятся отдельно и недолго."""
+
+    def __init__(self, maxsize: int, ttl: float, negative_maxsize: int, negative_ttl: float):
+        self.users = TTLCache(maxsize, ttl)
+        self.invalid = TTLCache(negative_maxsize, negative_ttl)
+
+    def get(self, api_key: str) -> Optional[UserIdentity]:
+        return self.users.get(api_key)
+
+    def is_invalid(self, api_key: str) -> bool:
+        return self.invalid.get(api_key, False)
+
+    def set(self, api_key: str, user: Optional[UserIdentity]):
+        if user is None:
+            self.invalid.set(api_key, True)
+        else:
+            self.invalid.evict(api_key)
+            self.users.set(api_key, user)
+
+    def evict(self, api_key: str):
+        self.users.evict(api_key)
+        self.invalid.evict(api_key)
+
+    def evict_user(self, user_id: str):
+        # Сброс по id: ключ пользователя не рассылается между воркерами
+        self.users.evict_values(lambda user: str(user.id) == user_id)
+
+    def clear(self):
+        self.users.clear()
+        self.invalid.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self.users),
+            'hits': self.users.hits,
+            'misses': self.users.misses,
+            'invalid_size': len(self.invalid),
+            'invalid_hits': self.invalid.hits,
+        }
+
+
+api_key_cache = ApiKeyCache(
+    maxsize=int(os.getenv('API_KEY_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('API_KEY_CACHE_TTL', '30')),
+    negative_maxsize=int(os.getenv('API_KEY_NEGATIVE_CACHE_SIZE', '10000')),
+    negative_ttl=float(os.getenv('API_KEY_NEGATIVE_CACHE_TTL', '5'))
+)
+
+# Удаление пользователя в одном воркере сбрасывает его ключ во всех остальных
+API_KEY_EVICT_CHANNEL = 'api_key_evict'
+broadcast.listen(API_KEY_EVICT_CHANNEL, api_key_cache.evict_user)
+# Сбросы, пропущенные без соединения, не восстановить: кэш очищается целиком
+broadcast.on_reconnect(api_key_cache.clear)
@@ -5,12 +5,15 @@ from sqlalchemy import select
 
 from src.database import SessionDep
 from src.users.models import UserModel, RoleEnum
+from src.users.cache import UserIdentity, api_key_cache
 
 
+API_KEY_LENGTH = UserModel.__table__.c.api_key.type.length
+
 async def get_current_user(
     session: SessionDep,
     authorization: Optional[str] = Header(None)
-) -> UserModel:
+) -> UserIdentity:
     if authorization is None or not authorization.startswith("TOKEN "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -19,9 +22,16 @@ async def get_current_user(
     
     token = authorization[len("TOKEN "):]
 
-    user = await session.scalar(
-        select(UserModel).where(UserModel.api_key == token)
-    )
+    user = api_key_cache.get(token)
+    if user is None and len(token) == API_KEY_LENGTH and not api_key_cache.is_invalid(token):
+        row = (await session.execute(
+            select(UserModel.id, UserModel.role).where(UserModel.api_key == token)
+        )).first()
+        user = UserIdentity(id=row.id, role=row.role) if row else None
+        api_key_cache.set(token, user)
+        # Заявки исполняются в собственных сессиях движка: соединение запроса
+        # не должно оставаться занятым, пока они ждут пул
+        await session.close()
 
     if user is None:
         raise HTTPException(
@@ -31,7 +41,7 @@ async def get_current_user(
 
     return user
 
-async def get_current_admin(user: UserModel = Depends(get_current_user)) -> UserModel:
+async def get_current_admin(user: UserIdentity = Depends(get_current_user)) -> UserIdentity:
     if user.role != RoleEnum.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, update, func
 
 from src.database import SessionDep
 from src.users.models import UserModel 
 from src.users.schemas import UserRegistrationSchema, UserRegistrationResponceSchema
 from src.users.utils import generate_api_key
 from src.users.dependencies import get_current_admin
+from src.users.cache import api_key_cache, API_KEY_EVICT_CHANNEL
+from src.orders.models import OrderModel
+from src.orders.engine import OPEN_STATUSES
+from src.orders.contention import lock_tickers
+from src.instruments.models import InstrumentModel
 
 
 auth_router = APIRouter()
@@ -52,7 +57,26 @@ async def delete_user(
         "api_key": user.api_key,
     }
     
+    # Открытые заявки удаляются каскадом мимо стаканов: book_seq их тикеров
+    # сдвигается, и стаканы перечитываются следующей командой
+    tickers = (await session.scalars(
+        select(OrderModel.ticker)
+        .where(OrderModel.user_id == user.id)
+        .where(OrderModel.status.in_(OPEN_STATUSES))
+        .distinct()
+    )).all()
+    if tickers:
+        await lock_tickers(session, tickers)
+        await session.execute(
+            update(InstrumentModel)
+            .where(InstrumentModel.ticker.in_(tickers))
+            .values(book_seq=InstrumentModel.book_seq + 1)
+        )
+
     await session.delete(user)
+    # Уведомление доставляется другим воркерам только после коммита
+    await session.execute(select(func.pg_notify(API_KEY_EVICT_CHANNEL, str(user.id))))
     await session.commit()
+    api_key_cache.evict(user.api_key)
 
     return deleted_user_data
\ No newline at end of file
@@ -0,0 +1,61 @@
+import pytest
+from fastapi import HTTPException
+
+from src.balance.settlement import Settlement
+from src.orders.models import DirectionEnum
+
+
+def test_transfers_are_netted_per_user_and_ticker():
+    settlement = Settlement()
+
+    settlement.transfer('taker', 'maker-1', 'MEMCOIN', 2, 100)
+    settlement.transfer('taker', 'maker-1', 'MEMCOIN', 1, 101)
+    settlement.transfer('taker', 'maker-2', 'MEMCOIN', 3, 102)
+
+    assert dict(settlement.deltas) == {
+        ('taker', 'RUB'): -607,
+        ('taker', 'MEMCOIN'): 6,
+        ('maker-1', 'RUB'): 301,
+        ('maker-1', 'MEMCOIN'): -3,
+        ('maker-2', 'RUB'): 306,
+        ('maker-2', 'MEMCOIN'): -3,
+    }
+
+def test_makers_paying_from_reserve_are_not_checked():
+    settlement = Settlement()
+
+    settlement.transfer('maker', 'taker', 'MEMCOIN', 2, 100)
+    settlement.release('maker', DirectionEnum.BUY, 'MEMCOIN', 2, 100)
+    settlement.reserve('taker', DirectionEnum.SELL, 'MEMCOIN', 3, 100)
+
+    assert dict(settlement.locks) == {('maker', 'RUB'): -200, ('taker', 'MEMCOIN'): 3}
+    assert settlement.checked() == {('taker', 'MEMCOIN')}
+
+def test_insufficient_reports_only_checked_rows():
+    settlement = Settlement()
+    settlement.transfer('taker', 'maker', 'MEMCOIN', 2, 100)
+    settlement.release('maker', DirectionEnum.SELL, 'MEMCOIN', 2, 100)
+
+    assert settlement.insufficient([('maker', 'MEMCOIN', -5), ('taker', 'RUB', 0)]) is None
+    assert settlement.insufficient([('taker', 'RUB', -1)]) == 'RUB'
+
+def test_cancelled_reserve_is_released_and_zero_rows_skipped():
+    settlement = Settlement()
+    settlement.reserve('user', DirectionEnum.BUY, 'MEMCOIN', 4, 25)
+    settlement.release('user', DirectionEnum.BUY, 'MEMCOIN', 4, 25)
+    settlement.release('other', DirectionEnum.SELL, 'MEMCOIN', 3, 25)
+
+    assert settlement.keys() == [('other', 'MEMCOIN')]
+    assert settlement.checked() == set()
+
+def test_batch_orders_are_checked_against_running_balance():
+    available = {('taker', 'RUB'): 250}
+    first, second = Settlement(), Settlement()
+    first.reserve('taker', DirectionEnum.BUY, 'MEMCOIN', 2, 100)
+    second.reserve('taker', DirectionEnum.BUY, 'MEMCOIN', 1, 100)
+
+    first.require(available)
+    with pytest.raises(HTTPException):
+        second.require(available)
+
+    assert available == {('taker', 'RUB'): 50}
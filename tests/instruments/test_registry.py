@@ -0,0 +1,56 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.instruments import router
+from src.instruments.registry import InstrumentRegistry, InstrumentSnapshot
+
+
+def make_registry():
+    registry = InstrumentRegistry(ttl=60)
+    registry._set(InstrumentSnapshot.build({'MEMCOIN': 'Memcoin', 'DODGE': 'Dodge'}))
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_add_and_remove_replace_snapshot():
+    registry = make_registry()
+    before = await registry.snapshot()
+
+    registry.add('ABC', 'Abc')
+    added = await registry.snapshot()
+    registry.remove('ABC')
+    removed = await registry.snapshot()
+
+    assert list(added.names) == ['ABC', 'DODGE', 'MEMCOIN']
+    assert added.etag != before.etag
+    assert removed.etag == before.etag
+    assert before.names == {'DODGE': 'Dodge', 'MEMCOIN': 'Memcoin'}
+
+@pytest.mark.asyncio
+async def test_invalidation_from_another_worker_reloads_snapshot(monkeypatch):
+    registry = make_registry()
+    reloaded = []
+
+    async def load():
+        reloaded.append(True)
+        registry._set(InstrumentSnapshot.build({'MEMCOIN': 'Memcoin'}))
+    monkeypatch.setattr(registry, 'load', load)
+
+    registry.invalidate('DODGE')
+    snapshot = await registry.snapshot()
+
+    assert reloaded == [True]
+    assert list(snapshot.names) == ['MEMCOIN']
+
+def test_instrument_list_returns_not_modified(monkeypatch):
+    monkeypatch.setattr(router, 'instrument_registry', make_registry())
+    client = TestClient(app)
+
+    response = client.get('/api/v1/public/instrument')
+    cached = client.get('/api/v1/public/instrument', headers={'If-None-Match': response.headers['ETag']})
+
+    assert response.json() == [{'name': 'Dodge', 'ticker': 'DODGE'}, {'name': 'Memcoin', 'ticker': 'MEMCOIN'}]
+    assert 'max-age' in response.headers['Cache-Control']
+    assert cached.status_code == 304
+    assert cached.content == b''
@@ -0,0 +1,101 @@
+from src.marketdata.feed import MarketDataFeed, Subscriber, RESYNC
+
+
+def test_publish_reaches_ticker_subscribers_only():
+    feed = MarketDataFeed()
+    memcoin = feed.subscribe('MEMCOIN')
+    other = feed.subscribe('OTHER')
+
+    feed.publish('MEMCOIN', 1, '{}')
+
+    assert memcoin.queue.get_nowait() == (1, '{}')
+    assert other.queue.empty()
+
+    feed.unsubscribe('MEMCOIN', memcoin)
+    assert not feed.has_subscribers('MEMCOIN')
+
+def test_slow_subscriber_is_coalesced_into_resync():
+    subscriber = Subscriber(maxsize=2)
+
+    for seq in range(3):
+        subscriber.push((seq, '{}'))
+    subscriber.push((3, '{}'))
+
+    assert subscriber.queue.get_nowait() is RESYNC
+    assert subscriber.queue.get_nowait() == (3, '{}')
+    assert subscriber.resyncs == 1
+
+class FakeRelay:
+    enabled = True
+
+    def __init__(self):
+        self.handlers = {}
+        self.sent = []
+        self.interest = []
+
+    def listen(self, channel, handler):
+        self.handlers[channel] = handler
+
+    def on_reconnect(self, handler):
+        pass
+
+    def send(self, channel, payload):
+        if channel == 'market_data':
+            self.sent.append(payload)
+        else:
+            self.interest.append(payload)
+
+def connect(*feeds):
+    # Доставляет объявления интереса каждого воркера всем остальным
+    for feed in feeds:
+        for message in feed.relay.interest:
+            for other in feeds:
+                if other is not feed:
+                    other.relay.handlers['market_data_interest'](message)
+        feed.relay.interest.clear()
+
+def test_updates_are_relayed_between_workers():
+    relay = FakeRelay()
+    feed = MarketDataFeed(relay)
+    subscriber = feed.subscribe('MEMCOIN')
+    relay.handlers['market_data_interest']('+other\tMEMCOIN')
+
+    feed.publish('MEMCOIN', 1, '{}')
+    feed.publish('MEMCOIN', 2, 'x' * 10000)
+    for message in relay.sent:
+        relay.handlers['market_data'](message)
+
+    assert relay.sent[0] == 'MEMCOIN\t1\t{}'
+    assert [subscriber.queue.get_nowait() for _ in range(4)] == [(1, '{}'), (2, 'x' * 10000), (1, '{}'), RESYNC]
+
+def test_updates_are_relayed_only_to_interested_workers():
+    publisher = MarketDataFeed(FakeRelay())
+    reader = MarketDataFeed(FakeRelay())
+
+    assert not publisher.wanted('MEMCOIN')
+    publisher.publish('MEMCOIN', 1, '{}')
+
+    subscriber = reader.subscribe('MEMCOIN')
+    connect(publisher, reader)
+    assert publisher.wanted('MEMCOIN')
+    assert not publisher.wanted('OTHER')
+    publisher.publish('MEMCOIN', 2, '{}')
+
+    reader.unsubscribe('MEMCOIN', subscriber)
+    connect(publisher, reader)
+    publisher.publish('MEMCOIN', 3, '{}')
+
+    assert publisher.relay.sent == ['MEMCOIN\t2\t{}']
+    assert not publisher.wanted('MEMCOIN')
+
+def test_joining_worker_learns_existing_interest():
+    reader = MarketDataFeed(FakeRelay())
+    reader.subscribe('MEMCOIN')
+    reader.relay.interest.clear()
+    publisher = MarketDataFeed(FakeRelay())
+
+    publisher.join()
+    connect(publisher, reader)
+    connect(reader, publisher)
+
+    assert publisher.wanted('MEMCOIN')
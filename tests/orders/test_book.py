@@ -0,0 +1,98 @@
+from datetime import datetime, timezone, timedelta
+
+from src.orders.book import OrderBook, RestingOrder
+from src.orders.models import DirectionEnum
+
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def make_order(order_id, direction, price, qty, filled=0, offset=0):
+    return RestingOrder(
+        id=order_id,
+        user_id=f'user-{order_id}',
+        direction=direction,
+        price=price,
+        qty=qty,
+        filled=filled,
+        timestamp=START + timedelta(seconds=offset)
+    )
+
+def make_book():
+    book = OrderBook('MEMCOIN', seq=0)
+    book.add(make_order('s1', DirectionEnum.SELL, 105, 5, offset=1))
+    book.add(make_order('s2', DirectionEnum.SELL, 101, 3, offset=2))
+    book.add(make_order('s3', DirectionEnum.SELL, 101, 4, offset=3))
+    book.add(make_order('b1', DirectionEnum.BUY, 99, 2, offset=4))
+    book.add(make_order('b2', DirectionEnum.BUY, 100, 6, filled=1, offset=5))
+    return book
+
+
+def test_levels_sorted_by_priority():
+    book = make_book()
+
+    assert [(level.price, level.qty) for level in book.asks] == [(101, 7), (105, 5)]
+    assert [(level.price, level.qty) for level in book.bids] == [(100, 5), (99, 2)]
+
+def test_match_is_price_time_priority_and_does_not_mutate():
+    book = make_book()
+
+    fills = book.match(DirectionEnum.BUY, 9)
+
+    assert [(fill.maker.id, fill.qty, fill.price) for fill in fills] == [
+        ('s2', 3, 101),
+        ('s3', 4, 101),
+        ('s1', 2, 105),
+    ]
+    assert book.asks.best().qty == 7
+    assert len(book) == 5
+
+def test_match_respects_limit_price():
+    book = make_book()
+
+    fills = book.match(DirectionEnum.SELL, 10, limit_price=100)
+
+    assert [(fill.maker.id, fill.qty) for fill in fills] == [('b2', 5)]
+
+def test_apply_removes_filled_orders_and_levels():
+    book = make_book()
+
+    book.apply(book.match(DirectionEnum.BUY, 8))
+
+    assert 's2' not in book
+    assert 's3' not in book
+    assert book.get('s1').filled == 1
+    assert [(level.price, level.qty) for level in book.asks] == [(105, 4)]
+
+def test_remove_order():
+    book = make_book()
+
+    book.remove('b2')
+    book.remove('missing')
+
+    assert [(level.price, level.qty) for level in book.bids] == [(99, 2)]
+
+def test_remove_from_middle_of_level_keeps_time_priority():
+    book = make_book()
+    book.add(make_order('s4', DirectionEnum.SELL, 101, 1, offset=6))
+
+    book.remove('s3')
+
+    assert [fill.maker.id for fill in book.match(DirectionEnum.BUY, 4)] == ['s2', 's4']
+    assert book.asks.best().qty == 4
+
+def test_quote_walks_cumulative_depth():
+    book = make_book()
+
+    assert book.quote(DirectionEnum.BUY, 9) == (9, 7 * 101 + 2 * 105, 105)
+    assert book.quote(DirectionEnum.SELL, 5) == (5, 500, 100)
+    assert book.quote(DirectionEnum.SELL, 10) == (7, 5 * 100 + 2 * 99, 99)
+
+def test_quote_follows_book_changes():
+    book = make_book()
+    book.quote(DirectionEnum.BUY, 1)
+
+    book.apply(book.match(DirectionEnum.BUY, 8))
+
+    assert book.quote(DirectionEnum.BUY, 4) == (4, 4 * 105, 105)
+    book.remove('s1')
+    assert book.quote(DirectionEnum.BUY, 1) == (0, 0, None)
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+
+from src.orders import contention
+from src.orders.contention import with_retry, ticker_lock_key
+
+
+class PgError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+def failing(sqlstate, failures):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise DBAPIError('UPDATE balance', {}, PgError(sqlstate))
+        return len(calls)
+    return operation
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(contention, 'backoff', lambda attempt: 0)
+
+
+@pytest.mark.asyncio
+async def test_deadlock_is_retried():
+    assert await with_retry(failing('40P01', 2)) == 3
+
+@pytest.mark.asyncio
+async def test_lock_timeout_is_retried():
+    assert await with_retry(failing('55P03', 1)) == 2
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_become_conflict(monkeypatch):
+    monkeypatch.setattr(contention, 'DB_RETRY_ATTEMPTS', 3)
+
+    with pytest.raises(HTTPException) as error:
+        await with_retry(failing('40001', 3))
+
+    assert error.value.status_code == 409
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    with pytest.raises(DBAPIError):
+        await with_retry(failing('23505', 1))
+
+def test_lock_key_fits_bigint():
+    keys = [ticker_lock_key(f'T{index}') for index in range(1000)]
+
+    assert all(-2 ** 63 <= key < 2 ** 63 for key in keys)
+    assert len(set(keys)) == len(keys)
+
+@pytest.mark.asyncio
+async def test_deleted_user_is_unauthorized():
+    async def operation():
+        error = PgError('23503')
+        error.__cause__ = type('ForeignKeyViolation', (Exception,), {'constraint_name': 'orders_user_id_fkey'})()
+        raise DBAPIError('INSERT INTO orders', {}, error)
+
+    with pytest.raises(HTTPException) as error:
+        await with_retry(operation)
+
+    assert error.value.status_code == 401
@@ -0,0 +1,154 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from src.orders.engine import TickerEngine, MatchingEngine
+from src.instruments.registry import instrument_registry
+from src.orders.book import OrderBook, RestingOrder
+from src.orders.models import DirectionEnum, StatusEnum, OrderHistoryModel
+from src.balance.settlement import Settlement
+
+
+def add_order(book, order_id, direction, price, qty):
+    book.add(RestingOrder(
+        id=order_id,
+        user_id='user',
+        direction=direction,
+        price=price,
+        qty=qty,
+        filled=0,
+        timestamp=None
+    ))
+
+
+def test_remove_orders_updates_levels_and_seq():
+    engine = TickerEngine('MEMCOIN')
+    engine.book = OrderBook('MEMCOIN', seq=1)
+    add_order(engine.book, 'b1', DirectionEnum.BUY, 99, 2)
+    add_order(engine.book, 'b2', DirectionEnum.BUY, 99, 3)
+    add_order(engine.book, 'a1', DirectionEnum.SELL, 101, 5)
+
+    engine.remove_orders(2, ['b1', 'a1', 'missing'])
+
+    assert [(level.price, level.qty) for level in engine.book.bids] == [(99, 3)]
+    assert list(engine.book.asks) == []
+    assert engine.book.seq == 2
+
+def test_snapshot_follows_book_seq():
+    engine = TickerEngine('MEMCOIN')
+    engine.book = OrderBook('MEMCOIN', seq=3)
+    add_order(engine.book, 'b1', DirectionEnum.BUY, 99, 2)
+    add_order(engine.book, 'b2', DirectionEnum.BUY, 100, 1)
+    add_order(engine.book, 'a1', DirectionEnum.SELL, 101, 5)
+
+    snapshot = engine.snapshot()
+
+    assert json.loads(snapshot) == {
+        'bid_levels': [{'price': 100, 'qty': 1}, {'price': 99, 'qty': 2}],
+        'ask_levels': [{'price': 101, 'qty': 5}],
+        'seq': 3,
+    }
+    assert engine.snapshot() is snapshot
+
+    engine.book.apply(engine.book.match(DirectionEnum.SELL, 1))
+    engine.book.seq = 4
+
+    assert json.loads(engine.snapshot())['bid_levels'] == [{'price': 99, 'qty': 2}]
+
+
+@pytest.mark.asyncio
+async def test_exclusive_holds_ticker_queue():
+    engine = TickerEngine('MEMCOIN')
+    calls = []
+
+    async def command():
+        calls.append('command')
+
+    async with engine.exclusive():
+        pending = asyncio.ensure_future(engine.submit(command))
+        await asyncio.sleep(0.01)
+        assert calls == []
+
+    await pending
+    assert calls == ['command']
+    await engine.stop()
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+
+    def add(self, instance):
+        self.added.append(instance)
+
+def test_execute_collects_trades_and_reservations():
+    engine = TickerEngine('MEMCOIN')
+    engine.book = OrderBook('MEMCOIN', seq=1)
+    add_order(engine.book, 'a1', DirectionEnum.SELL, 101, 2)
+    add_order(engine.book, 'a2', DirectionEnum.SELL, 102, 1)
+    session = FakeSession()
+    settlement = Settlement()
+
+    execution = engine.execute(settlement, 'taker', DirectionEnum.BUY, 5, 102)
+    engine.record(session, execution)
+
+    assert [(trade.buyer_id, trade.seller_id, trade.amount, trade.price) for trade in execution.trades] == [
+        ('taker', 'user', 2, 101),
+        ('taker', 'user', 1, 102),
+    ]
+    assert dict(settlement.locks) == {('user', 'MEMCOIN'): -3, ('taker', 'RUB'): 204}
+    assert settlement.deltas[('taker', 'RUB')] == -304
+    assert [order.status for order in session.added] == [StatusEnum.PARTIALLY_EXECUTED]
+
+def test_executed_order_goes_straight_to_history():
+    engine = TickerEngine('MEMCOIN')
+    engine.book = OrderBook('MEMCOIN', seq=1)
+    add_order(engine.book, 'a1', DirectionEnum.SELL, 101, 2)
+    session = FakeSession()
+
+    engine.record(session, engine.execute(Settlement(), 'taker', DirectionEnum.BUY, 2, None))
+
+    assert [type(order) for order in session.added] == [OrderHistoryModel]
+    assert session.added[0].status == StatusEnum.EXECUTED
+
+@pytest.mark.asyncio
+async def test_unknown_ticker_does_not_start_engine(monkeypatch):
+    async def exists(ticker):
+        return False
+    monkeypatch.setattr(instrument_registry, 'exists', exists)
+    engine = MatchingEngine()
+
+    with pytest.raises(HTTPException):
+        await engine.loaded('NOPE')
+
+    assert engine._tickers == {}
+
+@pytest.mark.asyncio
+async def test_discard_stops_ticker_task():
+    engine = MatchingEngine()
+    ticker_engine = engine.get('MEMCOIN')
+    ticker_engine.book = OrderBook('MEMCOIN', seq=1)
+    await ticker_engine.submit(ticker_engine.install, OrderBook('MEMCOIN', seq=2))
+    task = ticker_engine._task
+
+    await engine.discard('MEMCOIN')
+
+    assert task.done()
+    assert 'MEMCOIN' not in engine._tickers
+
+def test_invalidate_drops_cached_snapshot():
+    engine = TickerEngine('MEMCOIN')
+    engine.book = OrderBook('MEMCOIN', seq=3)
+    add_order(engine.book, 'a1', DirectionEnum.SELL, 101, 5)
+    engine._checked_at = float('inf')
+
+    # Пакет изменил стакан, но не зафиксировался
+    engine._dirty = True
+    assert not engine.fresh(1)
+    engine.snapshot()
+    engine.invalidate()
+    assert not engine.fresh(1)
+    engine.book = OrderBook('MEMCOIN', seq=3)
+
+    assert json.loads(engine.snapshot())['ask_levels'] == []
@@ -0,0 +1,30 @@
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+import src.main  # noqa: F401
+from src.orders.history import move_statement, user_orders_query
+from src.orders.models import StatusEnum
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+def test_open_orders_are_read_from_live_table_only():
+    sql = compile_sql(user_orders_query(uuid4(), StatusEnum.NEW, limit=10))
+
+    assert 'orders_history' not in sql
+    assert 'UNION ALL' not in sql
+
+def test_listing_reads_both_tables():
+    sql = compile_sql(user_orders_query(uuid4(), StatusEnum.EXECUTED, ticker='MEMCOIN', limit=10))
+
+    assert 'FROM orders_history' in sql
+    assert 'UNION ALL' in sql
+
+def test_mover_deletes_and_inserts_in_one_statement():
+    sql = compile_sql(move_statement(100))
+
+    assert sql.startswith('WITH moved AS')
+    assert 'FOR UPDATE SKIP LOCKED' in sql
+    assert 'INSERT INTO orders_history' in sql
@@ -0,0 +1,80 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from src.orders import engine
+from src.orders.journal import Journal, JournalUnit, OrderAccepted, OrderFilled, OrderCancelled, read_segment, encode_unit
+from src.orders.models import DirectionEnum, StatusEnum
+from src.orders.recovery import collect_units
+
+
+def make_unit(seq, ticker='MEMCOIN'):
+    timestamp = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    maker, taker = uuid4(), uuid4()
+    return JournalUnit(ticker, seq, [
+        OrderAccepted(uuid4(), taker, DirectionEnum.BUY, 5, 102, 3, StatusEnum.PARTIALLY_EXECUTED, timestamp),
+        OrderFilled(uuid4(), uuid4(), taker, maker, DirectionEnum.SELL, 3, 101, timestamp),
+        OrderCancelled(uuid4(), maker, DirectionEnum.SELL, 2, 105),
+    ])
+
+@pytest.mark.asyncio
+async def test_units_round_trip_through_segment(tmp_path):
+    journal = Journal(str(tmp_path))
+    units = [make_unit(1), make_unit(2)]
+
+    await asyncio.gather(journal.append(units[:1]), journal.append(units[1:]))
+    await journal.close()
+
+    written = list(read_segment(journal.path))
+    assert [unit._replace(written_ns=0) for unit in written] == units
+    assert all(unit.written_ns > 0 for unit in written)
+
+def test_torn_tail_is_ignored(tmp_path):
+    path = os.path.join(tmp_path, 'segment-1-1.log')
+    with open(path, 'wb') as file:
+        file.write(encode_unit(make_unit(1)) + encode_unit(make_unit(2))[:-3])
+
+    assert [unit.seq for unit in read_segment(path)] == [1]
+
+def test_aborted_unit_is_replaced_by_next_transaction(tmp_path):
+    first, second = make_unit(7), make_unit(7)
+    path = os.path.join(tmp_path, 'segment-1-42.log')
+    with open(path, 'wb') as file:
+        file.write(encode_unit(first) + encode_unit(first._replace(events=[], aborted=True)) + encode_unit(second))
+
+    units = collect_units([path])
+
+    assert units == [second]
+
+def test_units_are_collected_in_global_write_order(tmp_path):
+    first = make_unit(3)._replace(written_ns=1)
+    second = make_unit(8, 'DOGE')._replace(written_ns=2)
+    third = make_unit(4)._replace(written_ns=3)
+    for pid, units in ((1, [first, third]), (2, [second])):
+        with open(os.path.join(tmp_path, f'segment-1-{pid}.log'), 'wb') as file:
+            file.write(b''.join(encode_unit(unit) for unit in units))
+
+    units = collect_units([os.path.join(tmp_path, name) for name in ('segment-1-1.log', 'segment-1-2.log')])
+
+    assert units == [first, second, third]
+
+class FailingSession:
+    async def flush(self):
+        pass
+
+    async def commit(self):
+        raise ConnectionError('commit failed')
+
+@pytest.mark.asyncio
+async def test_failed_commit_is_not_replayed(tmp_path, monkeypatch):
+    journal = Journal(str(tmp_path))
+    monkeypatch.setattr(engine, 'order_journal', journal)
+
+    with pytest.raises(ConnectionError):
+        await engine.commit_journaled(FailingSession(), [make_unit(5)])
+    await journal.close()
+
+    assert collect_units([journal.path]) == []
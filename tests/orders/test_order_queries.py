@@ -0,0 +1,55 @@
+import random
+import string
+from uuid import uuid4
+
+import pytest
+
+from src.monitoring.queries import assert_max_queries
+from src.users.models import UserModel, RoleEnum
+from src.users.utils import generate_api_key
+
+
+async def create_user(client, session, amount):
+    admin_key = generate_api_key()
+    session.add(UserModel(name=f'admin-{uuid4().hex[:8]}', role=RoleEnum.ADMIN, api_key=admin_key))
+    await session.commit()
+    admin = {'Authorization': f'TOKEN {admin_key}'}
+
+    ticker = ''.join(random.choices(string.ascii_uppercase, k=8))
+    await client.post('/api/v1/admin/instrument', json={'name': 'Рубль', 'ticker': 'RUB'}, headers=admin)
+    await client.post('/api/v1/admin/instrument', json={'name': ticker, 'ticker': ticker}, headers=admin)
+
+    user = (await client.post('/api/v1/public/register', json={'name': 'Query Test'})).json()
+    await client.post(
+        '/api/v1/admin/balance/deposit',
+        json={'user_id': user['id'], 'ticker': 'RUB', 'amount': amount},
+        headers=admin
+    )
+    return {'Authorization': f"TOKEN {user['api_key']}"}, ticker
+
+@pytest.mark.asyncio
+async def test_create_order_query_count(client, session):
+    headers, ticker = await create_user(client, session, 10000)
+    order = {'direction': 'BUY', 'ticker': ticker, 'qty': 1, 'price': 10}
+
+    # Первая заявка загружает стакан и кэш ключа
+    await client.post('/api/v1/order', json=order, headers=headers)
+    with assert_max_queries(7):
+        response = await client.post('/api/v1/order', json=order, headers=headers)
+
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_orders_list_query_count(client, session):
+    headers, ticker = await create_user(client, session, 10000)
+    for price in range(1, 21):
+        await client.post(
+            '/api/v1/order',
+            json={'direction': 'BUY', 'ticker': ticker, 'qty': 1, 'price': price},
+            headers=headers
+        )
+
+    with assert_max_queries(1):
+        response = await client.get('/api/v1/order', headers=headers)
+
+    assert len(response.json()) == 20
@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from src.orders.models import DirectionEnum, StatusEnum
+from src.orders.router import order_to_schema
+from src.orders.schemas import OrderBodySchema, LimitOrderBodySchema, MarketOrderBodySchema, orders_adapter
+
+
+body_adapter = TypeAdapter(OrderBodySchema)
+
+def test_order_body_is_chosen_by_price():
+    limit = body_adapter.validate_python({'direction': 'BUY', 'ticker': 'MEMCOIN', 'qty': 2, 'price': 10})
+    market = body_adapter.validate_python({'direction': 'SELL', 'ticker': 'MEMCOIN', 'qty': 2})
+
+    assert isinstance(limit, LimitOrderBodySchema)
+    assert type(market) is MarketOrderBodySchema
+
+def test_invalid_price_is_not_parsed_as_market_order():
+    with pytest.raises(ValidationError):
+        body_adapter.validate_python({'direction': 'BUY', 'ticker': 'MEMCOIN', 'qty': 2, 'price': 0})
+
+def test_order_rows_serialize_like_validated_schemas():
+    timestamp = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        SimpleNamespace(
+            id=uuid4(), status=StatusEnum.NEW, user_id=uuid4(), timestamp=timestamp,
+            direction=DirectionEnum.BUY, ticker='MEMCOIN', qty=5, price=price, filled=0
+        )
+        for price in (10, None)
+    ]
+
+    fast = orders_adapter.dump_json([order_to_schema(row) for row in rows])
+    validated = orders_adapter.dump_json(orders_adapter.validate_python(
+        [order_to_schema(row).model_dump() for row in rows]
+    ))
+
+    assert fast == validated
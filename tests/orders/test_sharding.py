@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.orders import sharding
+from src.orders.engine import OrderResult
+from src.orders.models import DirectionEnum, StatusEnum
+from src.orders.sharding import HashRing, ShardRouter
+
+
+TICKERS = [f'T{index:04d}' for index in range(2000)]
+
+def test_ring_moves_few_tickers_when_shard_added():
+    four = HashRing(4)
+    five = HashRing(5)
+
+    counts = [sum(four.shard(ticker) == shard for ticker in TICKERS) for shard in range(4)]
+    moved = sum(four.shard(ticker) != five.shard(ticker) for ticker in TICKERS)
+
+    assert min(counts) > len(TICKERS) / 4 * 0.6
+    assert moved < len(TICKERS) * 0.35
+    assert all(five.shard(ticker) == 4 for ticker in TICKERS if four.shard(ticker) != five.shard(ticker))
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    async def place_order(self, ticker, user_id, direction, qty, price):
+        if qty > 100:
+            raise HTTPException(status_code=400, detail='Insufficient balance for RUB')
+        self.calls.append((ticker, user_id, direction, qty, price))
+        return OrderResult(order_id=str(uuid4()), filled=qty, status=StatusEnum.EXECUTED)
+
+    async def cancel_orders(self, user_id, ticker, direction):
+        self.calls.append((ticker, user_id, direction))
+        return [uuid4(), uuid4()]
+
+
+@pytest.mark.asyncio
+async def test_orders_are_forwarded_to_owner(tmp_path, monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(sharding, 'matching_engine', engine)
+    first = ShardRouter(2, str(tmp_path))
+    second = ShardRouter(2, str(tmp_path))
+    await first.start()
+    await second.start()
+    try:
+        ticker = next(ticker for ticker in TICKERS if first.owns(ticker))
+        user_id = uuid4()
+
+        result = await second.place_order(ticker, user_id, DirectionEnum.BUY, 5, 10)
+        with pytest.raises(HTTPException) as error:
+            await second.place_order(ticker, user_id, DirectionEnum.BUY, 500, 10)
+
+        assert (first.shard, second.shard) == (0, 1)
+        assert not second.owns(ticker)
+        assert (result.filled, result.status) == (5, StatusEnum.EXECUTED)
+        assert engine.calls == [(ticker, user_id, DirectionEnum.BUY, 5, 10)]
+        assert (error.value.status_code, error.value.detail) == (400, 'Insufficient balance for RUB')
+
+        cancelled = await second.cancel_orders(user_id, ticker, DirectionEnum.SELL)
+
+        assert len(cancelled) == 2
+        assert engine.calls[-1] == (ticker, user_id, DirectionEnum.SELL)
+    finally:
+        await second.stop()
+        await first.stop()
@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_roundtrip():
+    timestamp = datetime(2025, 5, 7, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    order_id = uuid4()
+
+    assert decode_cursor(encode_cursor(timestamp, order_id)) == (timestamp, order_id)
+
+@pytest.mark.parametrize('cursor', ['garbage', '@@@', encode_cursor(datetime.now(timezone.utc), 'not-a-uuid')])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
@@ -0,0 +1,34 @@
+import pytest
+
+from src.monitoring import queries
+from src.monitoring.queries import QueryStats, count_queries, assert_max_queries
+
+
+def test_nested_counters_see_inner_queries():
+    with count_queries() as outer:
+        queries.query_stats.get().record('SELECT 1', 0.5)
+        with count_queries() as inner:
+            queries.query_stats.get().record('SELECT 2', 0.25)
+
+    assert (inner.count, inner.duration) == (1, 0.25)
+    assert (outer.count, outer.duration) == (2, 0.75)
+    assert queries.query_stats.get() is None
+
+def test_problems_report_budget_and_repeats(monkeypatch):
+    monkeypatch.setattr(queries, 'QUERY_BUDGET', 3)
+    monkeypatch.setattr(queries, 'QUERY_REPEAT_LIMIT', 2)
+    stats = QueryStats()
+    for _ in range(4):
+        stats.record('UPDATE balance SET amount = $1', 0.0)
+
+    problems = stats.problems()
+
+    assert len(problems) == 2
+    assert 'budget of 3' in problems[0]
+    assert 'repeated 4 times' in problems[1]
+
+def test_assert_max_queries_fails_over_limit():
+    with pytest.raises(AssertionError, match='at most 1 queries, got 2'):
+        with assert_max_queries(1):
+            queries.query_stats.get().record('SELECT 1', 0.0)
+            queries.query_stats.get().record('SELECT 1', 0.0)
@@ -0,0 +1,20 @@
+import pytest
+
+from src.monitoring.readiness import readiness
+
+
+@pytest.mark.asyncio
+async def test_orders_are_gated_until_warm(client):
+    readiness.begin()
+    try:
+        assert (await client.get('/health/live')).status_code == 200
+        response = await client.get('/api/v1/public/orderbook/MEMCOIN')
+        assert response.status_code == 503
+        assert response.headers['retry-after'] == '1'
+
+        readiness.set_ready({'books': 1, 'orders': 3})
+        await readiness.wait()
+        response = await client.get('/health/ready')
+        assert response.json() == {'status': 'ready', 'bootstrap': {'books': 1, 'orders': 3}}
+    finally:
+        readiness.set_ready(None)
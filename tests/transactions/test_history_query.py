@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.transactions.router import history_query
+
+
+def compiled(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+@pytest.mark.parametrize('cursor, bound', [('before', '<='), ('after', '>=')])
+def test_cursor_bounds_timestamp_for_index_range(cursor, bound):
+    position = (datetime(2026, 10, 17, tzinfo=timezone.utc), uuid4())
+
+    sql = compiled(history_query('MEMCOIN', 10, **{cursor: position}))
+
+    assert f'transactions.timestamp {bound} %(timestamp_1)s AND (' in sql
@@ -0,0 +1,38 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from src.transactions import partitions
+from src.transactions.partitions import add_months, month_start, partition_name, partition_month
+
+
+def test_month_arithmetic_crosses_years():
+    month = month_start(datetime(2025, 11, 17, 13, 5, tzinfo=timezone.utc))
+
+    assert month == datetime(2025, 11, 1, tzinfo=timezone.utc)
+    assert add_months(month, 2) == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -11) == datetime(2024, 12, 1, tzinfo=timezone.utc)
+
+def test_partition_names_round_trip():
+    month = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+    assert partition_name(month) == 'transactions_y2026m03'
+    assert partition_month('transactions_y2026m03') == month
+    assert partition_month('transactions_default') is None
+
+class LockedSession:
+    # Блокировку обслуживания держит другой воркер
+    async def scalar(self, statement):
+        return False
+
+@pytest.mark.asyncio
+async def test_archive_refuses_while_maintenance_lock_is_held(monkeypatch, tmp_path):
+    @asynccontextmanager
+    async def new_async_session():
+        yield LockedSession()
+
+    monkeypatch.setattr(partitions, 'new_async_session', new_async_session)
+
+    with pytest.raises(partitions.MaintenanceInProgress):
+        await partitions.archive_partitions(datetime(2025, 1, 1, tzinfo=timezone.utc), str(tmp_path))
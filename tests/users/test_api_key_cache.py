@@ -0,0 +1,51 @@
+from uuid import uuid4
+
+from src.users.cache import ApiKeyCache, TTLCache, UserIdentity
+from src.users.models import RoleEnum
+
+
+def test_ttl_cache_is_bounded_lru():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=-1)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+def test_api_key_cache_evicts_user_and_invalid_keys():
+    cache = ApiKeyCache(maxsize=10, ttl=60, negative_maxsize=10, negative_ttl=60)
+    user = UserIdentity(id=uuid4(), role=RoleEnum.USER)
+    cache.set('valid', user)
+    cache.set('unknown', None)
+
+    assert cache.get('valid') is user
+    assert cache.is_invalid('unknown')
+
+    cache.evict('valid')
+    cache.evict('unknown')
+
+    assert cache.get('valid') is None
+    assert not cache.is_invalid('unknown')
+
+def test_api_key_cache_evicts_by_user_id():
+    cache = ApiKeyCache(maxsize=10, ttl=60, negative_maxsize=10, negative_ttl=60)
+    user = UserIdentity(id=uuid4(), role=RoleEnum.USER)
+    other = UserIdentity(id=uuid4(), role=RoleEnum.USER)
+    cache.set('key', user)
+    cache.set('other', other)
+
+    cache.evict_user(str(user.id))
+
+    assert cache.get('key') is None
+    assert cache.get('other') is other